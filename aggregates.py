@@ -0,0 +1,229 @@
+"""
+Aggregates computed from the per-season records at build time.
+
+- careers: every player's totals, joined across all FILES_CONFIG seasons
+- head to head: record against each opponent (W/D/L, goals, shootouts)
+- leaderboards: top scorers, assist makers and most booked players
+- sort orders: for every table the stats page shows, the row order for each
+  sortable column and direction, so the browser never sorts
+
+Players are joined on the id the build gives them (see player_identity.py),
+else on their name tokens regardless of order and accents ('Scocco Davide'
+in the totals sheet is 'Davide Scocco' in a season sheet), opponents on their name without spaces or punctuation ('Birra Real' and
+'Birrareal' are one opponent). compare_all_time() uses the careers to check
+the hand-maintained STATS TOTALI.xlsx.
+"""
+import re
+
+from text_utils import fold
+
+LEADERBOARD_SIZE = 10
+SCORE_RE = re.compile(r'(\d+)\s*-\s*(\d+)')
+
+
+def player_key(name):
+    return ' '.join(sorted(re.findall(r'[a-z0-9]+', fold(name))))
+
+
+def identity(row):
+    """What joins a stats row to the same player's other rows: its player id, else its name tokens."""
+    return row.get('player_id') or player_key(row['name'])
+
+
+def opponent_key(opponent):
+    return re.sub(r'[^a-z0-9]', '', fold(opponent))
+
+
+def _count(value):
+    # Untracked stats ('-', e.g. assists in 19/20) add nothing
+    return value if isinstance(value, int) else 0
+
+
+# --- CAREERS ---
+def careers(season_data, seasons):
+    """
+    One record per player with their totals over `seasons` (newest first).
+    The name is spelled as in the player's most recent season.
+    """
+    players = {}
+    for key in seasons:
+        for row in season_data.get(key, []):
+            pkey = identity(row)
+            if not pkey:
+                continue
+            if pkey not in players:
+                players[pkey] = {
+                    "name": row['name'], "player_id": row.get('player_id'), "seasons": 1, "first_season": key, "last_season": key,
+                    "apps": 0, "goals": 0, "assists": 0, "yellow_cards": 0, "red_cards": 0
+                }
+            career = players[pkey]
+            if career['first_season'] != key:
+                career['seasons'] += 1
+            career['first_season'] = key
+            for col in ('apps', 'goals', 'assists', 'yellow_cards', 'red_cards'):
+                career[col] += _count(row.get(col))
+
+    for career in players.values():
+        career['goals_per_app'] = round(career['goals'] / career['apps'], 2) if career['apps'] else 0
+    return list(players.values())
+
+
+# --- HEAD TO HEAD ---
+def match_goals(match):
+    """(Tamarindi goals, opponent goals), or None if the score isn't a plain 'a-b'."""
+    parts = str(match['score']).split('-')
+    if len(parts) != 2 or not parts[0].strip().isdigit() or not parts[1].strip().isdigit():
+        return None
+    home, away = int(parts[0]), int(parts[1])
+    return (home, away) if match['home_status'] == 'In Casa' else (away, home)
+
+
+def _shootout_won(match):
+    """True/False for a won/lost shootout, None if there was none (or it can't be read)."""
+    if match['result'] in ('W(SO)', 'L(SO)'):
+        return match['result'] == 'W(SO)'
+    scores = SCORE_RE.findall(str(match.get('shootout_score') or ''))
+    if not scores:
+        return None
+    home, away = (int(s) for s in scores[-1])
+    ours, theirs = (home, away) if match['home_status'] == 'In Casa' else (away, home)
+    return ours > theirs if ours != theirs else None
+
+
+def head_to_head(matches):
+    """One record per opponent, most recently played first (`matches` newest first)."""
+    records = {}
+    for match in matches:
+        key = opponent_key(match['opponent'])
+        if not key:
+            continue
+        if key not in records:
+            records[key] = {
+                "opponent": match['opponent'], "played": 0, "won": 0, "drawn": 0, "lost": 0,
+                "goals_for": 0, "goals_against": 0, "shootouts_won": 0, "shootouts_lost": 0,
+                "first_date": match['date'], "last_date": match['date']
+            }
+        record = records[key]
+        record['played'] += 1
+        record['first_date'] = min(record['first_date'], match['date'])
+        record['last_date'] = max(record['last_date'], match['date'])
+
+        goals = match_goals(match)
+        if goals:
+            record['goals_for'] += goals[0]
+            record['goals_against'] += goals[1]
+        # A shootout follows a draw: it counts as drawn, plus a shootout won/lost
+        result = match['result']
+        if result == 'W':
+            record['won'] += 1
+        elif result == 'L':
+            record['lost'] += 1
+        elif result in ('D', 'W(SO)', 'L(SO)'):
+            record['drawn'] += 1
+        shootout = _shootout_won(match) if match.get('shootout_score') else None
+        if shootout is True:
+            record['shootouts_won'] += 1
+        elif shootout is False:
+            record['shootouts_lost'] += 1
+
+    for record in records.values():
+        record['goal_difference'] = record['goals_for'] - record['goals_against']
+    return list(records.values())
+
+
+# --- LEADERBOARDS ---
+def _top(rows, value, size=LEADERBOARD_SIZE):
+    ranked = sorted((r for r in rows if value(r) > 0), key=lambda r: (-value(r), fold(r['name'])))
+    return [{"name": r['name'], "value": value(r)} for r in ranked[:size]]
+
+
+def leaderboards(career_rows, season_data, seasons):
+    """Career top goals/assists/cards, plus each season's top scorers."""
+    return {
+        "goals": _top(career_rows, lambda r: r['goals']),
+        "assists": _top(career_rows, lambda r: r['assists']),
+        "cards": _top(career_rows, lambda r: r['yellow_cards'] + r['red_cards']),
+        "season_goals": {key: _top(season_data.get(key, []), lambda r: _count(r.get('goals')), size=3)
+                         for key in seasons}
+    }
+
+
+# --- SORT ORDERS ---
+def _sort_key(value, column):
+    # Same ordering as the comparator js/stats.js used to sort with
+    if value == '-' or value is None:
+        return (0, -999)
+    if column == 'number':
+        match = re.match(r'\s*[-+]?\d+', str(value))
+        return (0, int(match.group()) if match else 0)
+    if isinstance(value, str):
+        try:
+            return (0, float(value))
+        except ValueError:
+            return (1, value.lower())
+    return (0, value)
+
+
+def sort_orders(records):
+    """
+    {column: {"asc": [row indices], "desc": [...]}} for every column.
+    Equal values keep the table's own order in both directions, as a stable
+    sort with the comparator flipped would.
+    """
+    columns = []
+    for record in records:
+        # Player ids join rows, no table sorts by them
+        columns.extend(c for c in record if c not in columns and c != 'player_id')
+    orders = {}
+    for col in columns:
+        keys = [_sort_key(record.get(col), col) for record in records]
+        rows = range(len(records))
+        orders[col] = {
+            "asc": sorted(rows, key=lambda i: keys[i]),
+            "desc": sorted(rows, key=lambda i: keys[i], reverse=True)
+        }
+    return orders
+
+
+# --- SPREADSHEET CHECK ---
+def compare_all_time(career_rows, all_time):
+    """
+    Compares STATS TOTALI.xlsx with the careers summed from the season sheets.
+    Returns a list of {"name", "column", "sheet", "seasons"} differences
+    (column 'missing' when the player has no season rows at all).
+    """
+    by_key = {identity(r): r for r in career_rows}
+    differences = []
+    for row in all_time:
+        career = by_key.get(identity(row))
+        if career is None:
+            differences.append({"name": row['name'], "column": "missing", "sheet": row['total_apps'], "seasons": 0})
+            continue
+        for total_col, col in (('total_apps', 'apps'), ('total_goals', 'goals'), ('total_assists', 'assists')):
+            if row[total_col] != career[col]:
+                differences.append({"name": row['name'], "column": col, "sheet": row[total_col], "seasons": career[col]})
+    return differences
+
+
+def build_aggregate_shards(final_data, seasons, sections=('stats', 'matches')):
+    """
+    Returns the aggregates/* shards and an orders/<table> shard for every
+    table js/stats.js renders (stats/<season>, stats/all_time and the aggregates).
+    `sections` limits them to those computed from the season stats ('stats':
+    careers, leaderboards) and/or from the matches ('matches': head to head).
+    """
+    shards = {}
+    tables = {}
+    if 'stats' in sections:
+        career_rows = careers(final_data, seasons)
+        shards['aggregates/careers'] = career_rows
+        shards['aggregates/leaderboards'] = leaderboards(career_rows, final_data, seasons)
+        tables = {f'stats/{key}': final_data.get(key, []) for key in seasons}
+        tables['stats/all_time'] = final_data.get('all_time', [])
+        tables['aggregates/careers'] = career_rows
+    if 'matches' in sections:
+        shards['aggregates/head_to_head'] = head_to_head(final_data.get('matches', []))
+        tables['aggregates/head_to_head'] = shards['aggregates/head_to_head']
+    for name, records in tables.items():
+        shards[f'orders/{name}'] = sort_orders(records)
+    return shards
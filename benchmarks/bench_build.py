@@ -0,0 +1,275 @@
+"""
+Benchmark suite: the whole build on synthetic inputs, stage by stage, against stored baselines.
+
+Generates a synthetic site (benchmarks/synth_data.py) in a temporary folder,
+serves a matching YouTube channel from benchmarks/fake_youtube.py (so it runs
+offline, answering after --latency like the real API) and builds it with
+--profile instrumentation in three scenarios:
+
+    cold   every workbook parsed, full channel sync, every thumbnail made
+    warm   nothing changed: manifest hits, one conditional (304) API request
+    edit   one season workbook changed and one new upload
+
+Each build runs in a fresh process, and the three scenarios are repeated
+--repeat times on fresh inputs. For every scenario and stage it reports the
+median wall time, CPU time, peak traced memory and throughput (rows, matches,
+thumbnails and requests per second), and how the build's wall time compares
+with its stages' summed (the stages overlap, see build_graph.py). It then
+compares the medians with benchmarks/baselines/<name>.json and exits
+non-zero on a regression beyond --tolerance (and the MIN_* floors): in any
+stage's CPU time, or in the whole build's wall time and peak memory. A
+stage's own wall time and peak include whatever ran alongside it (the fake
+API's latency, other stages on the same CPU), so they are reported but vary
+too much from run to run to gate on.
+
+    python benchmarks/bench_build.py [--seasons 7] [--matches 200] [--events 8] [--players 40]
+                                     [--images 4] [--videos 2000] [--latency 0.1] [--jobs 1]
+                                     [--repeat 3] [--baseline default] [--save-baseline] [--tolerance 0.3]
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+import synth_data  # noqa: E402
+from fake_youtube import FakeYouTube, make_videos  # noqa: E402
+
+BASELINE_DIR = os.path.join(BENCH_DIR, 'baselines')
+CHANNEL_ID = 'UCbench'
+# Differences below these are noise, whatever the ratio
+MIN_WALL_DELTA_S = 0.25
+MIN_CPU_DELTA_S = 0.1
+MIN_PEAK_DELTA_BYTES = 1024 * 1024
+# counter -> stage whose wall time (with its sub-stages') it is divided by
+THROUGHPUT = {
+    'rows_parsed': 'ingest',
+    'matches_extracted': 'ingest',
+    'thumbnails_generated': 'gallery',
+    'http_requests': 'youtube/sync',
+}
+
+
+def point_build_at(build_script, workdir, configs):
+    """Redirects every input/output path of build_script into workdir."""
+    data_dir = os.path.join(workdir, 'data')
+    cache_dir = os.path.join(workdir, '.build_cache')
+    build_script.DATA_DIR = data_dir
+    build_script.OUTPUT_FILE = os.path.join(data_dir, 'website_data_cache.json')
+    build_script.GALLERY_DIR = os.path.join(workdir, 'images', 'gallery')
+    build_script.DECLARATIONS_DIR = os.path.join(workdir, 'declarations')
+    build_script.SHARDS_DIR = os.path.join(data_dir, 'shards')
+    build_script.SHARDS_MANIFEST_FILE = os.path.join(build_script.SHARDS_DIR, 'manifest.json')
+    build_script.STATS_DB_FILE = os.path.join(data_dir, 'stats.sqlite')
+    build_script.ALIASES_FILE = os.path.join(data_dir, 'player_aliases.json')
+    build_script.CACHE_DIR = cache_dir
+    build_script.MANIFEST_FILE = os.path.join(cache_dir, 'manifest.json')
+    build_script.VIDEO_INDEX_FILE = os.path.join(cache_dir, 'youtube_index.json')
+    build_script.VIDEO_LINK_REPORT_FILE = os.path.join(cache_dir, 'video_link_report.json')
+    build_script.THUMBNAIL_STATE_FILE = os.path.join(cache_dir, 'thumbnails.json')
+    build_script.TOTALS_CHECK_REPORT_FILE = os.path.join(cache_dir, 'totals_check.json')
+    build_script.FILES_CONFIG[:] = configs
+
+
+def run_build(workdir, configs, argv, env):
+    """Runs one profiled build (in a fresh worker process) and returns its profile report."""
+    os.environ.update(env)
+    sys.argv = ['build_script.py'] + argv
+    import build_profile
+    import build_script
+
+    point_build_at(build_script, workdir, configs)
+    args = build_script.parse_args()
+    build_profile.enable()
+    with contextlib.redirect_stdout(io.StringIO()):
+        final_data = build_script.build_site(args)
+        build_script.write_output(final_data, args)
+    report = build_profile.PROFILE.report()
+    report['output'] = {key: len(final_data[key]) for key in final_data}
+    return report
+
+
+def build_in_fresh_process(workdir, configs, argv, env):
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_build, workdir, configs, argv, env).result()
+
+
+def run_scenarios(args, verbose=True):
+    """Builds a fresh synthetic site cold, warm and after an edit; returns {scenario: profile report}."""
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset = synth_data.generate(workdir, args.seasons, args.matches, args.events, args.players,
+                                      images=args.images)
+        configs = dataset['configs']
+        videos = synth_data.make_channel(dataset['matches'], noise=args.videos)
+        if verbose:
+            print(f"Synthetic site: {len(configs)} seasons, {len(dataset['matches'])} matches, "
+                  f"{args.images} photos, {len(videos)} uploads")
+
+        youtube = FakeYouTube(CHANNEL_ID, videos, latency=args.latency)
+        env = {'YOUTUBE_API_KEY': 'bench', 'TORNEICONTI_CHANNEL_ID': CHANNEL_ID,
+               'YOUTUBE_API_BASE': youtube.start()}
+        argv = ['--jobs', str(args.jobs)]
+        reports = {}
+        try:
+            reports['cold'] = build_in_fresh_process(workdir, configs, argv + ['--force'], env)
+            reports['warm'] = build_in_fresh_process(workdir, configs, argv, env)
+
+            edited = configs[0]
+            synth_data.generate_season(workdir, edited, args.matches + 1, args.events, args.players, seed=2)
+            newest = max(m['date'] for m in dataset['matches']) + datetime.timedelta(days=1)
+            youtube.upload(make_videos(1, newest=newest.replace(tzinfo=datetime.timezone.utc),
+                                       title="Tamarindi F.C. - nuovo video", prefix='new'))
+            reports['edit'] = build_in_fresh_process(workdir, configs, argv, env)
+        finally:
+            youtube.stop()
+
+    # The synthetic inputs must come out complete
+    for season, (players, matches) in dataset['expected'].items():
+        parsed = reports['cold']['output'].get(season)
+        if parsed != players:
+            print(f"WARNING: {season}: {parsed} players parsed, {players} generated")
+    return reports
+
+
+def summarize(report):
+    """Top-level stages, totals, throughput and stage overlap of one build."""
+    stages = {s['name']: {k: s[k] for k in ('wall_s', 'cpu_s', 'peak_bytes')}
+              for s in report['stages'] if s['name'].count('/') <= 1}
+    stages['total'] = {k: report['total'][k] for k in ('wall_s', 'cpu_s', 'peak_bytes')}
+    throughput = {}
+    for counter, stage in THROUGHPUT.items():
+        wall = sum(s['wall_s'] for s in report['stages'] if s['name'] == stage or s['name'].startswith(stage + '/'))
+        if report['counters'].get(counter) and wall:
+            throughput[f"{counter}_per_s"] = round(report['counters'][counter] / wall, 1)
+    # Stages that contain no other: their walls add up to the build's if nothing overlaps
+    names = [s['name'] for s in report['stages']]
+    leaves = [s for s in report['stages'] if not any(n.startswith(s['name'] + '/') for n in names)]
+    overlap = {'stages_wall_s': round(sum(s['wall_s'] for s in leaves), 4),
+               'longest_stage_wall_s': max((s['wall_s'] for s in leaves), default=0)}
+    return {'stages': stages, 'counters': report['counters'], 'throughput': throughput, 'overlap': overlap}
+
+
+def median_results(runs):
+    """The median of every stage metric, throughput and overlap figure over repeated runs' summaries."""
+    def median(values):
+        return round(statistics.median(values), 4)
+
+    results = {}
+    for scenario in runs[0]:
+        summaries = [run[scenario] for run in runs]
+        stages = {}
+        for stage in summaries[0]['stages']:
+            if all(stage in s['stages'] for s in summaries):
+                stages[stage] = {metric: median([s['stages'][stage][metric] for s in summaries])
+                                 for metric in ('wall_s', 'cpu_s', 'peak_bytes')}
+        results[scenario] = {
+            'stages': stages,
+            'counters': summaries[0]['counters'],
+            'throughput': {key: median([s['throughput'].get(key, 0) for s in summaries])
+                           for key in summaries[0]['throughput']},
+            'overlap': {key: median([s['overlap'][key] for s in summaries]) for key in summaries[0]['overlap']},
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regression messages (slower or bigger than baseline beyond tolerance)."""
+    regressions = []
+    for scenario, result in results.items():
+        for stage, now in result['stages'].items():
+            before = baseline.get('results', {}).get(scenario, {}).get('stages', {}).get(stage)
+            if not before:
+                continue
+            if (now['cpu_s'] > before['cpu_s'] * (1 + tolerance)
+                    and now['cpu_s'] - before['cpu_s'] > MIN_CPU_DELTA_S):
+                regressions.append(f"{scenario}/{stage}: {now['cpu_s']:.3f}s CPU vs {before['cpu_s']:.3f}s baseline")
+            if stage != 'total':
+                continue
+            if (now['wall_s'] > before['wall_s'] * (1 + tolerance)
+                    and now['wall_s'] - before['wall_s'] > MIN_WALL_DELTA_S):
+                regressions.append(f"{scenario}/{stage}: {now['wall_s']:.3f}s wall vs {before['wall_s']:.3f}s baseline")
+            if (now['peak_bytes'] > before['peak_bytes'] * (1 + tolerance)
+                    and now['peak_bytes'] - before['peak_bytes'] > MIN_PEAK_DELTA_BYTES):
+                regressions.append(f"{scenario}/{stage}: peak {now['peak_bytes'] / 2**20:.1f} MiB "
+                                   f"vs {before['peak_bytes'] / 2**20:.1f} MiB baseline")
+    return regressions
+
+
+def print_results(results, baseline):
+    for scenario, result in results.items():
+        print(f"\n[{scenario}]")
+        for stage, now in result['stages'].items():
+            before = baseline.get('results', {}).get(scenario, {}).get('stages', {}).get(stage)
+            delta = f"  ({(now['wall_s'] / before['wall_s'] - 1) * 100:+.0f}% wall)" if before and before['wall_s'] else ''
+            print(f"  {stage:<24} {now['wall_s']:>8.3f}s wall {now['cpu_s']:>8.3f}s CPU "
+                  f"{now['peak_bytes'] / 2**20:>7.1f} MiB{delta}")
+        if result['throughput']:
+            print("  " + ", ".join(f"{k}={v}" for k, v in result['throughput'].items()))
+        overlap = result['overlap']
+        print(f"  {result['stages']['total']['wall_s']:.3f}s wall for {overlap['stages_wall_s']:.3f}s of stages "
+              f"(longest {overlap['longest_stage_wall_s']:.3f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=7)
+    parser.add_argument('--matches', type=int, default=200, help="Matches per season.")
+    parser.add_argument('--events', type=int, default=8, help="Maximum event rows per match.")
+    parser.add_argument('--players', type=int, default=40, help="Players per season.")
+    parser.add_argument('--images', type=int, default=4, help="Gallery photos.")
+    parser.add_argument('--videos', type=int, default=2000, help="Unrelated uploads on the fake channel.")
+    parser.add_argument('--latency', type=float, default=0.1, help="Seconds the fake API takes per response.")
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs of the three scenarios; medians are compared.")
+    parser.add_argument('--baseline', default='default', help="Baseline name in benchmarks/baselines/.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="Allowed slowdown/growth (0.3 = 30%%).")
+    args = parser.parse_args()
+
+    params = {k: getattr(args, k) for k in ('seasons', 'matches', 'events', 'players', 'images', 'videos', 'latency',
+                                            'jobs')}
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.baseline}.json")
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != params:
+            print(f"Baseline '{args.baseline}' was recorded with {baseline.get('params')}; not comparing.")
+            baseline = {}
+
+    runs = []
+    for repeat in range(max(1, args.repeat)):
+        reports = run_scenarios(args, verbose=repeat == 0)
+        runs.append({scenario: summarize(report) for scenario, report in reports.items()})
+    results = median_results(runs)
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({'params': params, 'results': results}, f, indent=1)
+        print(f"\nBaseline saved to {baseline_path}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    if regressions:
+        print("\nREGRESSIONS:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("\nNo regressions." if baseline else "\nNo baseline to compare with (use --save-baseline).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
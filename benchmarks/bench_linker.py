@@ -0,0 +1,125 @@
+"""
+Benchmark: indexed match<->video linker vs. the old nested matches x videos scan.
+
+Builds a synthetic channel (default 100k uploads, most of them unrelated to
+the team) around a synthetic fixture list, links it with video_linker and,
+on a sample of matches, with the old loop, and reports timings plus how many
+matches each approach linked to the right video, and how many videos it
+attached to a match they don't belong to.
+
+    python benchmarks/bench_linker.py [--videos 100000] [--matches 1500] [--legacy-sample 40]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import video_linker  # noqa: E402
+
+OPPONENTS = ['ASD Roma70', 'F.C. Mostacciano', 'Alitalia', 'Real Garbatella', 'Città di Ostia',
+             'Atletico Monteverde', 'Sporting Pigneto', 'Virtus Trastevere', 'Lazio Calcio a 8', 'Dinamo Prati']
+
+
+def legacy_link(matches, videos):
+    """The linker build_script.py used before video_linker (first team video within +-1 day)."""
+    for match in matches:
+        try:
+            match_date = datetime.datetime.strptime(match['date'], '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        for video in videos:
+            if abs(video['publishedAt'].date() - match_date).days > 1:
+                continue
+            title = video['title'].lower().replace(' ', '')
+            if any(name in title for name in ['tamarindi', 'palermo', 'tamardini']):
+                match['videoId'] = video['videoId']
+                break
+
+
+def make_fixtures(n_matches, n_videos, seed=7):
+    """Returns (matches, videos newest first, {match index: expected videoId})."""
+    rng = random.Random(seed)
+    start = datetime.datetime(2023, 9, 1, 20, 0, tzinfo=datetime.timezone.utc)
+    matches, videos, expected = [], [], {}
+
+    day = start
+    for i in range(n_matches):
+        day += datetime.timedelta(days=rng.choice([1, 2, 3, 4, 7]))
+        a, b = rng.randint(0, 9), rng.randint(0, 9)
+        opponent = rng.choice(OPPONENTS)
+        matches.append({'date': day.date().isoformat(), 'opponent': opponent, 'score': f"{a}-{b}"})
+        if rng.random() < 0.8:
+            upload = day + datetime.timedelta(hours=rng.choice([2, 20, 26]))
+            video_id = f"m{i:06d}"
+            videos.append({'title': f"Tamarindi F.C. vs {opponent} {a}-{b} | Highlights",
+                           'videoId': video_id, 'publishedAt': upload})
+            expected[i] = video_id
+
+    end = day + datetime.timedelta(days=2)
+    span = (end - start).total_seconds()
+    for j in range(max(0, n_videos - len(videos))):
+        published = start + datetime.timedelta(seconds=rng.random() * span)
+        title = f"Torneo {rng.randint(1, 50)} - {rng.choice(OPPONENTS)} vs Squadra {j}"
+        if rng.random() < 0.01:
+            title = "Tamarindi F.C. - allenamento"
+        videos.append({'title': title, 'videoId': f"x{j:07d}", 'publishedAt': published})
+
+    videos.sort(key=lambda v: v['publishedAt'], reverse=True)
+    return matches, videos, expected
+
+
+def accuracy(matches, expected, indexes):
+    """
+    (matches linked to their upload and nothing else, videos attached to a
+    match they don't belong to: another match's upload or an unrelated one).
+    """
+    correct = wrong = 0
+    for i in indexes:
+        attached = [v['videoId'] for v in matches[i].get('videos', [])]
+        if not attached and 'videoId' in matches[i]:
+            attached = [matches[i]['videoId']]  # the legacy loop only sets videoId
+        wrong += sum(1 for video_id in attached if video_id != expected.get(i))
+        if i in expected and attached == [expected[i]]:
+            correct += 1
+    return correct, wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--videos', type=int, default=100000)
+    parser.add_argument('--matches', type=int, default=1500)
+    parser.add_argument('--legacy-sample', type=int, default=40,
+                        help="Matches timed with the old O(matches x videos) loop (extrapolated to all).")
+    args = parser.parse_args()
+
+    matches, videos, expected = make_fixtures(args.matches, args.videos)
+    print(f"{len(matches)} matches, {len(videos)} videos, {len(expected)} matches with a team upload")
+
+    start = time.perf_counter()
+    report = video_linker.link_videos(matches, videos)
+    indexed = time.perf_counter() - start
+    correct, wrong = accuracy(matches, expected, range(len(matches)))
+    print(f"indexed linker: {indexed * 1000:9.1f} ms  linked {report['linked']}, "
+          f"correct {correct}/{len(expected)}, wrong {wrong}, "
+          f"ambiguous {len(report['ambiguous'])}, unlinked videos {len(report['unmatched_videos'])}")
+
+    sample = [dict(m) for m in matches[:args.legacy_sample]]
+    for m in sample:
+        m.pop('videoId', None)
+        m.pop('videos', None)
+    start = time.perf_counter()
+    legacy_link(sample, videos)
+    legacy = time.perf_counter() - start
+    estimate = legacy / max(1, len(sample)) * len(matches)
+    sample_expected = {i: v for i, v in expected.items() if i < len(sample)}
+    correct, wrong = accuracy(sample, sample_expected, range(len(sample)))
+    print(f"legacy scan:    {legacy * 1000:9.1f} ms for {len(sample)} matches "
+          f"(~{estimate:.1f} s for all, ~{estimate / indexed:.0f}x slower), "
+          f"correct {correct}/{len(sample_expected)}, wrong {wrong}")
+
+
+if __name__ == "__main__":
+    main()
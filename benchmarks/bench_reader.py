@@ -0,0 +1,106 @@
+"""
+Benchmark: streaming openpyxl reader vs. the pd.read_excel + iterrows path.
+
+Runs both readers on every season workbook in data/ and on synthetic copies
+of them whose body rows are repeated SCALE times, and reports time and peak
+Python memory (tracemalloc) for each. Both paths must produce the same output.
+
+    python benchmarks/bench_reader.py [--scale 100] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import build_script  # noqa: E402
+
+
+def pandas_path(path, config):
+    df = pd.read_excel(path, header=None)
+    return {
+        "stats": build_script.process_player_stats(df, config),
+        "matches": build_script.extract_matches(df, config['key'])
+    }
+
+
+def stream_path(path, config):
+    return build_script.stream_season(path, config)
+
+
+def make_scaled_copy(path, config, scale, out_dir):
+    """Writes a copy of the workbook whose rows after the header are repeated `scale` times."""
+    rows = [tuple(None if pd.isna(v) else v for v in row) for row in build_script.iter_sheet_rows(path)]
+    header, body = rows[:config['skip']], rows[config['skip']:]
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for row in header:
+        ws.append(row)
+    for _ in range(scale):
+        for row in body:
+            ws.append(row)
+
+    out_path = os.path.join(out_dir, f"x{scale} {config['filename']}")
+    wb.save(out_path)
+    return out_path
+
+
+def measure(func, path, config, repeat):
+    """Returns (best wall time in seconds, peak traced memory in MiB, result)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path, config)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func(path, config)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024), result
+
+
+def same_output(a, b):
+    # NaN != NaN, so compare through repr (both paths keep NaN in pass-through columns)
+    return repr(a) == repr(b)
+
+
+def run(label, path, config, repeat):
+    t_pd, m_pd, out_pd = measure(pandas_path, path, config, repeat)
+    t_st, m_st, out_st = measure(stream_path, path, config, repeat)
+    status = "ok" if same_output(out_pd, out_st) else "MISMATCH"
+    print(f"{label:<42} {t_pd * 1000:>9.1f} {t_st * 1000:>9.1f} {t_pd / t_st:>7.2f}x "
+          f"{m_pd:>9.1f} {m_st:>9.1f}  {status}")
+    return status == "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=int, default=100, help="Row multiplier for the synthetic sheets.")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case (best is reported).")
+    args = parser.parse_args()
+
+    print(f"{'workbook':<42} {'pandas ms':>9} {'stream ms':>9} {'speedup':>8} {'pd MiB':>9} {'st MiB':>9}")
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for config in build_script.FILES_CONFIG:
+            path = os.path.join(build_script.DATA_DIR, config['filename'])
+            if not os.path.exists(path): continue
+
+            ok &= run(config['filename'], path, config, args.repeat)
+            scaled = make_scaled_copy(path, config, args.scale, tmp)
+            ok &= run(f"  x{args.scale}", scaled, config, 1)
+
+    if not ok:
+        sys.exit("Streaming reader output differs from the pandas path.")
+
+
+if __name__ == "__main__":
+    main()
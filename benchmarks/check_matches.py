@@ -0,0 +1,110 @@
+"""
+Golden check for match extraction: compares what MatchExtractor produces with
+benchmarks/golden/matches.json.
+
+The golden file holds the matches extracted from
+    workbooks   every season workbook in data/, read with both readers
+    synthetic   a small synthetic site (benchmarks/synth_data.py, fixed seed)
+    cells       hand-written event cells (markers in every spelling, team
+                names, stray numbers, ...), each fed as the only event of a match
+Run it after touching the extractor or the event tokenizer; re-record the file
+with --update only when a change to the output is intended.
+
+    python benchmarks/check_matches.py [--update]
+"""
+import argparse
+import difflib
+import json
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+import build_script  # noqa: E402
+import synth_data  # noqa: E402
+
+GOLDEN_FILE = os.path.join(BENCH_DIR, 'golden', 'matches.json')
+
+EVENT_CELLS = [
+    'Rossi', 'Rossi (2)', 'rossi  mario (3)', '  Rossi   Bianchi  ', "D'Ippolito M. (2)", 'Àlex Pérez',
+    'Rossi [P]', 'Rossi (p)', 'Rossi [p] (2)', 'Rossi [Y]', 'Rossi (y)', 'Rossi [R]', 'Rossi (r)',
+    'Rossi [R parato]', 'Rossi (R PARATO)', 'Rossi r parato', 'Rossi [Y] [R]', 'Rossi [P] [Y]',
+    'Rossi [Y] [R parato]', '[Y]', '[P]', '(2)', '3', '2-1',
+    'Tamarindi F.C.', 'Rossi FC', 'Club Atletico', 'Torneo di Natale', 'Straße [Y]', 'Ⅻ Rossi',
+]
+
+
+def extract_workbooks(data_dir, configs):
+    import pandas as pd
+
+    workbooks = {}
+    for config in configs:
+        path = os.path.join(data_dir, config['filename'])
+        if not os.path.exists(path):
+            continue
+        stream = build_script.stream_season(path, config)['matches']
+        frame = build_script.extract_matches(pd.read_excel(path, header=None), config['key'])
+        if frame != stream:
+            raise AssertionError(f"{config['filename']}: the stream and pandas readers disagree")
+        workbooks[config['key']] = stream
+    return workbooks
+
+
+def extract_cell(cell):
+    """The match produced by a home fixture whose only event row is `cell` (19/20 and later layouts)."""
+    results = {}
+    for key, date_row, event_row in (
+            ('season_19_20', ['2024-01-10', '', 'Tamarindi F.C.', '', 2, '-', 1, 'Birra Real'],
+             ['', '', '', '', cell, '', '', '']),
+            ('season_24_25', ['2024-01-10', '', 'Tamarindi F.C.', '', '2-1', 'Birra Real', '', ''],
+             ['', '', cell, '', '', '', '', ''])):
+        extractor = build_script.MatchExtractor(key)
+        extractor.feed([build_script.NAN if v == '' else v for v in date_row])
+        extractor.feed([build_script.NAN if v == '' else v for v in event_row])
+        match, = extractor.finish()
+        results[key] = {k: v for k, v in match.items() if k not in ('date', 'opponent', 'score', 'season', 'home_status')}
+    if results['season_19_20'] != results['season_24_25']:
+        raise AssertionError(f"{cell!r}: the 19/20 and later layouts disagree")
+    return results['season_24_25']
+
+
+def collect():
+    golden = {'workbooks': extract_workbooks(build_script.DATA_DIR, build_script.FILES_CONFIG)}
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset = synth_data.generate(workdir, seasons=7, matches=30, events=8, players=20, seed=3)
+        golden['synthetic'] = extract_workbooks(os.path.join(workdir, 'data'), dataset['configs'])
+    golden['cells'] = {cell: extract_cell(cell) for cell in EVENT_CELLS}
+    return golden
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--update', action='store_true', help="Re-record the golden file from the current code.")
+    args = parser.parse_args()
+
+    current = json.loads(json.dumps(collect(), ensure_ascii=False))
+    if args.update:
+        os.makedirs(os.path.dirname(GOLDEN_FILE), exist_ok=True)
+        with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=1, ensure_ascii=False)
+        print(f"Golden file written to {GOLDEN_FILE}")
+        return 0
+
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    if current == golden:
+        print(f"Match extraction matches {os.path.relpath(GOLDEN_FILE)}.")
+        return 0
+    expected = json.dumps(golden, indent=1, ensure_ascii=False).splitlines()
+    actual = json.dumps(current, indent=1, ensure_ascii=False).splitlines()
+    diff = list(difflib.unified_diff(expected, actual, 'golden', 'current', lineterm=''))
+    print("\n".join(diff[:200]))
+    if len(diff) > 200:
+        print(f"... {len(diff) - 200} more lines")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
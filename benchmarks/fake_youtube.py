@@ -0,0 +1,145 @@
+"""
+Local stand-in for the parts of the YouTube Data API v3 the build uses
+(`channels` and `playlistItems`), including ETags and `If-None-Match`.
+`latency` delays every response like a round trip to the real API would.
+
+    server = FakeYouTube(channel_id='UC123', videos=make_videos(120))
+    base = server.start()       # e.g. http://127.0.0.1:54321/youtube/v3
+    youtube_sync.sync_videos('key', 'UC123', index_path, api_base=base)
+    server.stop()
+
+Run directly to serve a synthetic channel for manual builds:
+
+    python benchmarks/fake_youtube.py --videos 500
+    YOUTUBE_API_BASE=http://127.0.0.1:8765/youtube/v3 YOUTUBE_API_KEY=x TORNEICONTI_CHANNEL_ID=UCfake python build_script.py
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAGE_SIZE = 50
+
+
+def make_videos(count, newest=datetime.datetime(2025, 11, 12, 20, 0, tzinfo=datetime.timezone.utc),
+                spacing=datetime.timedelta(days=1), title="Tamarindi F.C. - Avversario {i}", prefix='vid'):
+    """`count` uploads, newest first, one every `spacing`."""
+    return [{
+        'videoId': f'{prefix}{i:07d}',
+        'title': title.format(i=i),
+        'publishedAt': (newest - i * spacing).strftime('%Y-%m-%dT%H:%M:%SZ')
+    } for i in range(count)]
+
+
+class FakeYouTube:
+    def __init__(self, channel_id='UCfake', videos=None, host='127.0.0.1', port=0, latency=0.0):
+        self.channel_id = channel_id
+        self.videos = list(videos or [])  # newest first, like the uploads playlist
+        self.latency = latency  # seconds
+        self.requests = []  # (endpoint, params, status) for every request served
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/youtube/v3"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def upload(self, videos):
+        """Publishes new videos (newest first) at the top of the playlist."""
+        with self.lock:
+            self.videos = list(videos) + self.videos
+
+    def channels(self, params):
+        if params.get('id') != self.channel_id:
+            return {'items': []}
+        return {'items': [{'contentDetails': {'relatedPlaylists': {'uploads': f'UU{self.channel_id[2:]}'}}}]}
+
+    def playlist_items(self, params):
+        with self.lock:
+            start = int(params.get('pageToken') or 0)
+            size = min(int(params.get('maxResults', PAGE_SIZE)), PAGE_SIZE)
+            page = self.videos[start:start + size]
+            more = start + size < len(self.videos)
+        body = {'items': [{'snippet': {
+            'title': v['title'],
+            'publishedAt': v['publishedAt'],
+            'resourceId': {'videoId': v['videoId']}
+        }} for v in page]}
+        if more:
+            body['nextPageToken'] = str(start + size)
+        return body
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                endpoint = url.path.rsplit('/', 1)[-1]
+
+                if endpoint == 'channels':
+                    body = fake.channels(params)
+                elif endpoint == 'playlistItems':
+                    body = fake.playlist_items(params)
+                else:
+                    return self._reply(endpoint, params, 404, b'{"error": "not found"}')
+
+                payload = json.dumps(body).encode('utf-8')
+                etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    return self._reply(endpoint, params, 304, b'', etag)
+                return self._reply(endpoint, params, 200, payload, etag)
+
+            def _reply(self, endpoint, params, status, payload, etag=None):
+                with fake.lock:
+                    fake.requests.append((endpoint, params, status))
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic YouTube channel locally.")
+    parser.add_argument('--videos', type=int, default=200)
+    parser.add_argument('--channel-id', default='UCfake')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response.")
+    args = parser.parse_args()
+
+    fake = FakeYouTube(args.channel_id, make_videos(args.videos), port=args.port, latency=args.latency)
+    print(f"Serving {args.videos} videos for {args.channel_id} at {fake.base_url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Synthetic site inputs for benchmarks: season workbooks in every FILES_CONFIG
+layout, the all-time totals sheet, declarations, gallery photos and a matching
+YouTube channel.
+
+Each season workbook follows the layout of one FILES_CONFIG entry: the player
+table at that entry's column indexes after `skip` header rows, then the match
+list. 19/20 uses its own match layout (scores in two cells, events in columns
+4/6); the other seasons use 'a-b' scores with events in columns 2/5. Matches
+carry goals ('Name', 'Name (2)', '[P]'), cards ('[Y]', '[R]'), saved penalties
+('[R parato]') and, after some draws, a '[a-b dcr]' shootout row.
+
+    python benchmarks/synth_data.py OUT_DIR [--seasons 7] [--matches 40] [--events 6] [--players 30]
+
+writes OUT_DIR/data, OUT_DIR/declarations and OUT_DIR/images/gallery. With
+more seasons than FILES_CONFIG has, older seasons reuse the non-19/20 layouts.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from build_script import ALL_TIME_COLUMNS, ALL_TIME_FILENAME, FILES_CONFIG  # noqa: E402
+
+FIRST_NAMES = ['Marco', 'Luca', 'Matteo', 'Davide', 'Fabio', 'Alessio', 'Giuseppe', 'Andrea', 'Niccolò',
+               'Giorgio', 'Michele', 'Francesco', 'Leonardo', 'Flavio', 'Dario', 'Pietro', 'Federico']
+SURNAMES = ['Rossi', 'Bianchi', 'Conti', 'Ricci', 'Marino', 'Greco', 'Bruno', 'Gallo', 'Costa', 'Fontana',
+            'Caruso', 'Mancini', 'Lombardi', 'Moretti', 'Barbieri', 'Ferrara', 'Santoro', 'Rinaldi', 'Leone',
+            'Longo', 'Galli', 'Martini', 'Serra', 'Vitale', 'Coppola', 'De Santis', "D'Angelo", 'Farina']
+OPPONENTS = ['ASD Roma70', 'F.C. Mostacciano', 'Alitalia', 'Real Garbatella', 'Città di Ostia', 'Atletico Madrid',
+             'Sporting Pigneto', 'Virtus Trastevere', 'Dinamo Prati', 'Aston Birra', 'Newcastle', 'Venezia',
+             'Core de Roma', 'Desperados', 'Onda Blu', 'Mambo', 'Igeam', 'Portos', 'Family Matters', 'Blinders']
+TEAM = 'Tamarindi FC'
+TEAM_19_20 = 'Tamarindi F.C.'
+SECTIONS = ['Girone - Prima Fase', 'Amichevoli', 'Coppa - Ottavi', 'Playoff']
+ROLES = ['por', 'td', 'ts', 'dc', 'cc', 'att']
+MIN_WIDTH = 30  # the all-time sheet goes up to column 29
+
+
+def season_configs(seasons):
+    """FILES_CONFIG (newest first), extended with older seasons for seasons > len(FILES_CONFIG)."""
+    configs = [dict(c) for c in FILES_CONFIG[:seasons]]
+    layouts = [c for c in FILES_CONFIG if c['key'] != 'season_19_20']
+    start = int(FILES_CONFIG[-1]['key'].split('_')[1])  # 19
+    for i in range(seasons - len(configs)):
+        first = (start - 1 - i) % 100
+        key = f"season_{first:02d}_{(first + 1) % 100:02d}"
+        layout = layouts[i % len(layouts)]
+        configs.append(dict(layout, key=key, filename=f"SYNTH {key}.xlsx"))
+    return configs
+
+
+def season_start_year(key):
+    return 2000 + int(key.split('_')[1])
+
+
+def make_roster(rng, size):
+    names = set()
+    while len(names) < size:
+        names.add((rng.choice(FIRST_NAMES), rng.choice(SURNAMES)))
+    return sorted(names)
+
+
+def _blank(width):
+    return [None] * width
+
+
+def make_matches(rng, key, roster, count, events):
+    """The season's matches with their event cells, and per-player season totals."""
+    year = season_start_year(key)
+    day = datetime.datetime(year, 9, 15)
+    spacing = max(1, 260 // max(1, count))
+    totals = {p: {'apps': 0, 'goals': 0, 'yellow_cards': 0, 'red_cards': 0, 'assists': 0} for p in roster}
+    matches = []
+
+    for _ in range(count):
+        day += datetime.timedelta(days=spacing, hours=rng.choice([0, 1]))
+        home = rng.random() < 0.5
+        ours, theirs = rng.randint(0, 7), rng.randint(0, 7)
+        lineup = rng.sample(roster, min(len(roster), 8))
+        for player in lineup:
+            totals[player]['apps'] += 1
+
+        # Goals: one row per scorer, '(n)' for braces, some penalties
+        event_rows = []
+        left = ours
+        while left > 0 and len(event_rows) < events:
+            player = rng.choice(lineup)
+            goals = min(left, rng.choice([1, 1, 1, 2, 3]))
+            left -= goals
+            totals[player]['goals'] += goals
+            surname = player[1]
+            if goals > 1:
+                event_rows.append(f"{surname} ({goals})")
+            elif rng.random() < 0.15:
+                event_rows.append(f"{surname} [P]")
+            else:
+                event_rows.append(surname)
+        # Cards and saved penalties fill the remaining event rows
+        while len(event_rows) < events and rng.random() < 0.5:
+            player = rng.choice(lineup)
+            kind = rng.choice(['[Y]', '[Y]', '[Y]', '[R]', '[R parato]'])
+            if kind == '[Y]':
+                totals[player]['yellow_cards'] += 1
+            elif kind == '[R]':
+                totals[player]['red_cards'] += 1
+            event_rows.append(f"{player[1]} {kind}")
+
+        shootout = None
+        if ours == theirs and rng.random() < 0.3:
+            a, b = rng.choice([(3, 5), (5, 4), (4, 2), (2, 3)])
+            shootout = f"[{a}-{b} dcr]"
+
+        matches.append({
+            'date': day, 'home': home, 'opponent': rng.choice(OPPONENTS),
+            'ours': ours, 'theirs': theirs, 'events': event_rows, 'shootout': shootout,
+            'section': rng.choice(SECTIONS) if rng.random() < 0.2 else None,
+        })
+
+    for player in rng.sample(roster, len(roster) // 2):
+        totals[player]['assists'] = rng.randint(0, 6)
+    return matches, totals
+
+
+def match_rows(match, key, width):
+    rows = []
+    if match['section']:
+        row = _blank(width)
+        row[0] = match['section']
+        rows.append(row)
+
+    row = _blank(width)
+    row[0] = match['date']
+    home_goals, away_goals = (match['ours'], match['theirs']) if match['home'] else (match['theirs'], match['ours'])
+    if key == 'season_19_20':
+        row[2], row[7] = (TEAM_19_20, match['opponent']) if match['home'] else (match['opponent'], TEAM_19_20)
+        row[4], row[5], row[6] = home_goals, '            -', away_goals
+        event_col = 4 if match['home'] else 6
+    else:
+        row[2], row[5] = (TEAM, match['opponent']) if match['home'] else (match['opponent'], TEAM)
+        row[4] = f"{home_goals}-{away_goals}"
+        event_col = 2 if match['home'] else 5
+    rows.append(row)
+
+    if match['shootout']:
+        row = _blank(width)
+        row[4] = match['shootout']
+        rows.append(row)
+    for event in match['events']:
+        row = _blank(width)
+        row[event_col] = event
+        rows.append(row)
+    rows.append(_blank(width))
+    return rows
+
+
+def player_name(player, key):
+    # 19/20 lists players surname first, later seasons name first
+    return f"{player[1]} {player[0]}" if key == 'season_19_20' else f"{player[0]} {player[1]}"
+
+
+def write_season(path, config, roster, matches, totals):
+    width = max(MIN_WIDTH, max(config['cols']) + 1)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+
+    header = _blank(width)
+    for index, col in config['cols'].items():
+        header[index] = col.replace('_', ' ').title()
+    ws.append(header)
+    for _ in range(config['skip'] - 1):
+        ws.append(_blank(width))
+
+    for player in roster:
+        row = _blank(width)
+        for index, col in config['cols'].items():
+            if col == 'name':
+                row[index] = player_name(player, config['key'])
+            elif col == 'number':
+                row[index] = roster.index(player) + 1
+            else:
+                row[index] = totals[player][col]
+        ws.append(row)
+
+    ws.append(_blank(width))
+    for match in matches:
+        for row in match_rows(match, config['key'], width):
+            ws.append(row)
+    wb.save(path)
+
+
+def write_all_time(path, careers):
+    width = max(ALL_TIME_COLUMNS) + 1
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(['Giocatore'] + [None] * (width - 1))
+    ws.append(_blank(width))
+    ws.append(_blank(width))
+    for player, career in sorted(careers.items(), key=lambda item: item[0][1]):
+        row = _blank(width)
+        row[0] = f"{player[1]} {player[0]}"
+        row[2] = career['role']
+        row[11], row[20], row[29] = career['apps'], career['goals'], career['assists']
+        ws.append(row)
+    wb.save(path)
+
+
+def write_declarations(decl_dir, count, rng, newest):
+    os.makedirs(decl_dir, exist_ok=True)
+    words = ('la società comunica che il giocatore ha rinnovato il contratto per la prossima stagione '
+             'con grande soddisfazione di tutto lo staff tecnico e della dirigenza').split()
+    for i in range(count):
+        date = (newest - datetime.timedelta(days=7 * i)).date().isoformat()
+        body = ' '.join(rng.choice(words) for _ in range(120))
+        with open(os.path.join(decl_dir, f"synth_{i:04d}.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"Title: Comunicato {i}\nDate: {date}\nAuthor: Il Presidente\n\n{body}\n")
+
+
+def write_gallery(gallery_dir, count, rng, size=(2400, 1800)):
+    from PIL import Image  # only needed when photos are requested
+
+    os.makedirs(gallery_dir, exist_ok=True)
+    for i in range(count):
+        img = Image.effect_noise((size[0] // 8, size[1] // 8), 60 + i).convert('RGB').resize(size)
+        img.save(os.path.join(gallery_dir, f"IMG-SYNTH-{i:04d}.jpg"), quality=85)
+
+
+def make_channel(matches, noise=0, seed=11):
+    """
+    Uploads for a synthetic channel, newest first: a highlights video for most
+    team matches plus `noise` uploads of other teams, in the format of
+    benchmarks/fake_youtube.py.
+    """
+    rng = random.Random(seed)
+    videos = []
+    for i, match in enumerate(matches):
+        if match['date'] < datetime.datetime(2023, 8, 2) or rng.random() > 0.8:
+            continue
+        home, away = (match['ours'], match['theirs']) if match['home'] else (match['theirs'], match['ours'])
+        published = match['date'] + datetime.timedelta(hours=rng.choice([2, 20, 26]))
+        videos.append({'videoId': f"m{i:07d}", 'publishedAt': published,
+                       'title': f"Tamarindi F.C. vs {match['opponent']} {home}-{away} | Highlights"})
+    if matches:
+        start, end = min(m['date'] for m in matches), max(m['date'] for m in matches)
+        span = max(1, (end - start).total_seconds())
+        for j in range(noise):
+            published = start + datetime.timedelta(seconds=rng.random() * span)
+            videos.append({'videoId': f"x{j:07d}", 'publishedAt': published,
+                           'title': f"Torneo {rng.randint(1, 50)} - {rng.choice(OPPONENTS)} vs Squadra {j}"})
+    videos.sort(key=lambda v: v['publishedAt'], reverse=True)
+    return [dict(v, publishedAt=v['publishedAt'].strftime('%Y-%m-%dT%H:%M:%SZ')) for v in videos]
+
+
+def generate_season(out_dir, config, matches=40, events=6, players=30, seed=1):
+    """(Re)writes one season workbook under out_dir/data. Returns (roster, matches, totals)."""
+    pool = make_roster(random.Random(seed), players * 2)  # same pool for every season, so careers span seasons
+    rng = random.Random(f"{seed}-{config['key']}")
+    roster = sorted(rng.sample(pool, players))
+    season_matches, totals = make_matches(rng, config['key'], roster, matches, events)
+    write_season(os.path.join(out_dir, 'data', config['filename']), config, roster, season_matches, totals)
+    return roster, season_matches, totals
+
+
+def generate(out_dir, seasons=7, matches=40, events=6, players=30, declarations=10, images=0, seed=1):
+    """
+    Writes a full synthetic input tree under out_dir and returns
+    {'configs': season configs (FILES_CONFIG format), 'matches': every generated
+    match, 'expected': {season key: (players, matches)}}.
+    """
+    rng = random.Random(seed)
+    data_dir = os.path.join(out_dir, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+
+    configs = season_configs(seasons)
+    careers = {}
+    all_matches = []
+    expected = {}
+
+    for config in configs:
+        roster, season_matches, totals = generate_season(out_dir, config, matches, events, players, seed)
+        all_matches.extend(season_matches)
+        expected[config['key']] = (len(roster), len(season_matches))
+
+        tracked = set(config['cols'].values())
+        for player, stats in totals.items():
+            career = careers.setdefault(player, {'role': rng.choice(ROLES), 'apps': 0, 'goals': 0, 'assists': 0})
+            for col in ('apps', 'goals', 'assists'):
+                if col in tracked:
+                    career[col] += stats[col]
+
+    write_all_time(os.path.join(data_dir, ALL_TIME_FILENAME), careers)
+    newest = max(m['date'] for m in all_matches) if all_matches else datetime.datetime(2025, 11, 1)
+    write_declarations(os.path.join(out_dir, 'declarations'), declarations, rng, newest)
+    os.makedirs(os.path.join(out_dir, 'images', 'gallery'), exist_ok=True)
+    if images:
+        write_gallery(os.path.join(out_dir, 'images', 'gallery'), images, rng)
+
+    return {'configs': configs, 'matches': all_matches, 'expected': expected}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes synthetic workbooks, declarations and photos.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--seasons', type=int, default=7)
+    parser.add_argument('--matches', type=int, default=40, help="Matches per season.")
+    parser.add_argument('--events', type=int, default=6, help="Maximum event rows (goals, cards) per match.")
+    parser.add_argument('--players', type=int, default=30, help="Players per season.")
+    parser.add_argument('--declarations', type=int, default=10)
+    parser.add_argument('--images', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    dataset = generate(args.out_dir, args.seasons, args.matches, args.events, args.players,
+                       args.declarations, args.images, args.seed)
+    print(f"Wrote {len(dataset['configs'])} seasons, {len(dataset['matches'])} matches to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Build DAG executor: every stage of the build declares the values it needs
+and the values it produces, and starts as soon as its inputs are ready.
+
+    graph = build_graph.BuildGraph()
+    graph.add('ingest/season_25_26', parse_workbook, outputs=['parsed/season_25_26'],
+              args=(parse_season, config), kind='process')
+    graph.add('youtube/sync', sync_youtube, outputs=['videos'])
+    graph.add('youtube/link', link_youtube, inputs=['all_matches', 'videos'], outputs=['matches'])
+    values = graph.run(jobs=4)
+
+A stage is called with its fixed `args` followed by its input values, and
+returns the value of its single output, or a tuple with one value per output.
+
+kind='thread' stages (waiting on HTTP, disk or SQLite, or short and working
+on shared data in place) run on a thread pool. kind='process' stages
+(CPU-bound parsing) run on a pool of `jobs` worker processes, so their
+function, args and values must pickle. A thread stage that lists POOL among
+its inputs gets that process pool to fan its own work out to (the gallery's
+thumbnails). The pool is started before any stage thread, so no worker is
+forked while a thread holds a lock.
+
+With --profile each stage is measured as a build_profile stage under its
+name (a worker process's through run_measured()). The first stage that
+raises stops new stages from starting; run() waits for the running ones and
+re-raises the error.
+"""
+import concurrent.futures
+import os
+
+import build_profile
+
+POOL = 'pool'
+KINDS = ('thread', 'process')
+
+
+class Stage:
+    def __init__(self, name, func, inputs, outputs, args, kind):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = tuple(args)
+        self.kind = kind
+
+    def outputs_of(self, result):
+        """{output name: value} from what the stage returned."""
+        if not self.outputs:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if not isinstance(result, tuple) or len(result) != len(self.outputs):
+            raise ValueError(f"stage {self.name!r} must return {len(self.outputs)} values")
+        return dict(zip(self.outputs, result))
+
+
+def _run_thread_stage(stage, values):
+    with build_profile.stage(stage.name):
+        return stage.func(*stage.args, *values)
+
+
+class BuildGraph:
+    def __init__(self):
+        self.stages = []
+
+    def add(self, name, func, inputs=(), outputs=(), args=(), kind='thread'):
+        """Adds a stage; see the module docstring."""
+        if kind not in KINDS:
+            raise ValueError(f"stage {name!r}: kind must be one of {', '.join(KINDS)}")
+        if kind == 'process' and POOL in inputs:
+            raise ValueError(f"stage {name!r}: a process stage can't use the process pool")
+        if any(stage.name == name for stage in self.stages):
+            raise ValueError(f"stage {name!r} is added twice")
+        produced = self.produced()
+        for output in outputs:
+            if output == POOL or output in produced:
+                raise ValueError(f"stage {name!r}: {output!r} is already produced by another stage")
+        self.stages.append(Stage(name, func, inputs, outputs, args, kind))
+
+    def produced(self):
+        return {output for stage in self.stages for output in stage.outputs}
+
+    def run(self, values=None, jobs=1):
+        """
+        Runs every stage, with up to `jobs` worker processes, and returns the
+        given `values` plus every stage's outputs.
+        """
+        values = dict(values or {})
+        produced = self.produced()
+        for stage in self.stages:
+            missing = [i for i in stage.inputs if i != POOL and i not in values and i not in produced]
+            if missing:
+                raise ValueError(f"stage {stage.name!r} needs {', '.join(missing)}, which no stage produces")
+
+        pool = None
+        if any(stage.kind == 'process' or POOL in stage.inputs for stage in self.stages):
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=max(1, jobs))
+            # The workers start with the first task: before any stage thread exists
+            pool.submit(os.getpid).result()
+            values[POOL] = pool
+        threads = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, sum(stage.kind == 'thread' for stage in self.stages)))
+
+        pending = list(self.stages)
+        running = {}  # future -> stage
+        error = None
+        try:
+            while running or (pending and error is None):
+                if error is None:
+                    for stage in [s for s in pending if all(i in values for i in s.inputs)]:
+                        pending.remove(stage)
+                        running[self._submit(stage, values, pool, threads)] = stage
+                    if not running:
+                        names = ', '.join(stage.name for stage in pending)
+                        raise ValueError(f"stages {names} wait on each other's outputs")
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        result = future.result()
+                        if stage.kind == 'process' and build_profile.PROFILE.enabled:
+                            result, measured = result
+                            build_profile.PROFILE.add_stage(stage.name, measured)
+                        values.update(stage.outputs_of(result))
+                    except Exception as e:
+                        error = error or e
+        finally:
+            threads.shutdown(cancel_futures=True)
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        if error is not None:
+            raise error
+        values.pop(POOL, None)
+        return values
+
+    @staticmethod
+    def _submit(stage, values, pool, threads):
+        inputs = [values[name] for name in stage.inputs]
+        if stage.kind == 'thread':
+            return threads.submit(_run_thread_stage, stage, inputs)
+        if build_profile.PROFILE.enabled:
+            return pool.submit(build_profile.run_measured, stage.func, *stage.args, *inputs)
+        return pool.submit(stage.func, *stage.args, *inputs)
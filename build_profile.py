@@ -0,0 +1,205 @@
+"""
+Build instrumentation for --profile.
+
+Stages are timed with the `stage()` context manager (wall time, CPU time and
+peak traced memory) and nest by name ('ingest', 'ingest/season_25_26', ...);
+`count()` adds to named counters (rows parsed, matches extracted, HTTP
+requests, thumbnails generated, ...). Both are no-ops until enable() is
+called, so the normal build pays nothing for them.
+
+Work done in a worker process is wrapped in run_measured(), which measures it
+there and hands its stage and counters back to be merged with add_stage().
+
+The report written by write_report() looks like
+
+    {"version": 1, "started_at": "...", "argv": [...],
+     "total": {"wall_s": 3.2, "cpu_s": 2.9, "children_cpu_s": 0.0, "peak_bytes": ..., "max_rss_bytes": ...},
+     "stages": [{"name": "ingest", "wall_s": ..., "cpu_s": ..., "peak_bytes": ...}, ...],
+     "counters": {"rows_parsed": 1234, ...}}
+
+Peak memory is what tracemalloc sees (Python allocations), which slows the
+build down a little while profiling.
+
+Stages may run on several threads at once (see build_graph.py): each thread
+nests its own stages, and a stage's CPU time is its thread's. tracemalloc
+has one peak for the whole process, so the peak of a stage that overlapped
+others includes their allocations.
+"""
+import contextlib
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from file_utils import write_atomic
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+REPORT_VERSION = 1
+
+
+def _children_cpu():
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class BuildProfile:
+    def __init__(self):
+        self.enabled = False
+        self.stages = []
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        # [name, running peak] of the stages open on this thread
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def enable(self):
+        self.enabled = True
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._start = (time.perf_counter(), time.process_time(), _children_cpu())
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def _take_peak(self):
+        # tracemalloc has a single peak: fold it into the innermost open stage and start over
+        with self._lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        return peak
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        self._take_peak()
+        full_name = '/'.join([s[0] for s in self._stack] + [name])
+        self._stack.append([name, 0])
+        start = (time.perf_counter(), time.thread_time(), _children_cpu())
+        try:
+            yield
+        finally:
+            self._take_peak()
+            _, peak = self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+            self.stages.append({
+                "name": full_name,
+                "wall_s": round(time.perf_counter() - start[0], 4),
+                "cpu_s": round(time.thread_time() - start[1], 4),
+                "children_cpu_s": round(_children_cpu() - start[2], 4),
+                "peak_bytes": peak
+            })
+
+    def add_stage(self, name, measured):
+        """Records a stage measured by run_measured() (possibly in another process)."""
+        if not self.enabled:
+            return
+        prefix = '/'.join(s[0] for s in self._stack)
+        record = dict(measured['stage'], name=f"{prefix}/{name}" if prefix else name)
+        self.stages.append(record)
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], record['peak_bytes'])
+        for counter, n in measured['counters'].items():
+            self.count(counter, n)
+
+    def report(self):
+        import platform  # slow to import, and only needed here
+        self._take_peak()
+        wall_start, cpu_start, children_start = self._start
+        total = {
+            "wall_s": round(time.perf_counter() - wall_start, 4),
+            "cpu_s": round(time.process_time() - cpu_start, 4),
+            "children_cpu_s": round(_children_cpu() - children_start, 4),
+            "peak_bytes": max([s['peak_bytes'] for s in self.stages] + [tracemalloc.get_traced_memory()[1]]),
+        }
+        if resource is not None:
+            # ru_maxrss is in KiB on Linux, bytes on macOS
+            scale = 1 if sys.platform == 'darwin' else 1024
+            total["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        return {
+            "version": REPORT_VERSION,
+            "started_at": self.started_at.isoformat(timespec='seconds'),
+            "argv": sys.argv[1:],
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "total": total,
+            "stages": self.stages,
+            "counters": dict(sorted(self.counters.items()))
+        }
+
+    def write_report(self, path):
+        report = self.report()
+        write_atomic(path, json.dumps(report, indent=1).encode('utf-8'))
+        return report
+
+
+PROFILE = BuildProfile()
+# The profile run_measured() collects into on this thread, instead of PROFILE
+_measuring = threading.local()
+
+
+def _current():
+    return getattr(_measuring, 'profile', None) or PROFILE
+
+
+def enable():
+    PROFILE.enable()
+
+
+def stage(name):
+    return _current().stage(name)
+
+
+def count(name, n=1):
+    _current().count(name, n)
+
+
+def run_measured(func, *args):
+    """
+    Runs func(*args) as one profiled stage and returns (result, measurements)
+    for add_stage(). Meant to be submitted to a worker process.
+    """
+    if PROFILE.enabled:
+        PROFILE._take_peak()  # the open stage's peak so far, before `profile` resets it
+    profile = BuildProfile()
+    profile.enable()
+    previous, _measuring.profile = getattr(_measuring, 'profile', None), profile  # count() calls inside func land here
+    try:
+        with profile.stage('run'):
+            result = func(*args)
+    finally:
+        _measuring.profile = previous
+    stage_record = profile.stages[-1]
+    del stage_record['name']
+    return result, {"stage": stage_record, "counters": profile.counters}
+
+
+def print_summary(report, limit=12):
+    total = report['total']
+    print(f"Profile: {total['wall_s']:.2f}s wall, {total['cpu_s']:.2f}s CPU"
+          f" (+{total['children_cpu_s']:.2f}s in workers), peak {total['peak_bytes'] / 2**20:.1f} MiB traced")
+    for record in sorted(report['stages'], key=lambda s: -s['wall_s'])[:limit]:
+        print(f"  {record['name']:<32} {record['wall_s']:>8.3f}s wall {record['cpu_s']:>8.3f}s CPU"
+              f" {record['peak_bytes'] / 2**20:>8.1f} MiB")
+    if report['counters']:
+        print("  " + ", ".join(f"{name}={n}" for name, n in report['counters'].items()))
@@ -1,15 +1,62 @@
-import pandas as pd
 import json
 import os
-import requests
 import datetime
 import re
-from PIL import Image
+import hashlib
+import argparse
+import time
+
+# Only light modules here: pandas/numpy/openpyxl (workbooks), requests (YouTube),
+# PIL (gallery) and the preview server are imported by the stages that use them,
+# so e.g. `build declarations` starts without loading any of them.
+import compact_encoding
+import video_linker
+import search_index
+import aggregates
+import stats_store
+import player_identity
+import build_graph
+import build_profile
+from file_utils import file_hash, write_atomic
+from stats_store import EVENT_LISTS, STAT_COLUMNS
 
 # --- CONFIGURATION & SETTINGS ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data/')
 OUTPUT_FILE = os.path.join(DATA_DIR, 'website_data_cache.json')
+GALLERY_DIR = os.path.join(BASE_DIR, 'images', 'gallery')
+DECLARATIONS_DIR = os.path.join(BASE_DIR, 'declarations')
+
+# Per-page output: one JSON file per section/season plus a manifest of content hashes
+SHARDS_DIR = os.path.join(DATA_DIR, 'shards')
+SHARDS_MANIFEST_FILE = os.path.join(SHARDS_DIR, 'manifest.json')
+# Normalized SQLite copy of the stats and matches (see stats_store.py / stats_query.py)
+STATS_DB_FILE = os.path.join(DATA_DIR, 'stats.sqlite')
+# Manual overrides for joining player names (see player_identity.py)
+ALIASES_FILE = os.path.join(DATA_DIR, 'player_aliases.json')
+
+# Parts of the site `build <section>` can rebuild on their own, and the shards
+# (names or name prefixes) each one owns. The search index covers stats,
+# matches and declarations, so it is rebuilt along with any of them.
+SECTIONS = ('stats', 'matches', 'gallery', 'declarations')
+SECTION_SHARDS = {
+    'stats': ('stats/', 'aggregates/careers', 'aggregates/leaderboards', 'orders/stats/', 'orders/aggregates/careers'),
+    'matches': ('matches/', 'aggregates/head_to_head', 'orders/aggregates/head_to_head'),
+    'gallery': ('gallery',),
+    'declarations': ('declarations',),
+}
+SEARCH_SECTIONS = ('stats', 'matches', 'declarations')
+SEARCH_SHARDS = ('search/',)
+
+# Incremental build cache (content hashes + parsed output of each workbook)
+CACHE_DIR = os.path.join(BASE_DIR, '.build_cache')
+MANIFEST_FILE = os.path.join(CACHE_DIR, 'manifest.json')
+VIDEO_INDEX_FILE = os.path.join(CACHE_DIR, 'youtube_index.json')
+VIDEO_LINK_REPORT_FILE = os.path.join(CACHE_DIR, 'video_link_report.json')
+THUMBNAIL_STATE_FILE = os.path.join(CACHE_DIR, 'thumbnails.json')
+TOTALS_CHECK_REPORT_FILE = os.path.join(CACHE_DIR, 'totals_check.json')
+PROFILE_REPORT_FILE = os.path.join(CACHE_DIR, 'build_profile.json')
+ALL_TIME_FILENAME = 'STATS TOTALI.xlsx'
 
 REQUIRED_COLUMNS = ['name', 'number', 'apps', 'goals', 'assists', 'yellow_cards', 'red_cards']
 
@@ -24,72 +71,163 @@ FILES_CONFIG = [
     {"key": "season_19_20", "filename": "statistiche calci8 2019-2020.xlsx", "skip": 4, "cols": {0: 'name', 3: 'number', 7: 'apps', 9: 'goals', 12: 'yellow_cards', 13: 'red_cards'} }
 ]
 
-# (Other player processing functions remain unchanged for brevity)
+ALL_TIME_COLUMNS = {0: 'name', 2: 'role', 11: 'total_apps', 20: 'total_goals', 29: 'total_assists'}
 
-def is_real_player(row):
-    name = str(row['name']).strip()
-    if name.startswith('202') or name.startswith('201') or name.startswith('200'): return False
-    blacklist = ['Amichevoli', 'Torneo', 'Spring', 'Cup', 'Coppa', 'Playoff', 'Playout', 'Gironi', 'Ottavi', 'Quarti', 'Semifinale', 'Finale', 'Tamarindi']
-    if any(word in name for word in blacklist): return False
-    if pd.isna(row.get('apps')) or str(row.get('apps')).strip() == '': return False
-    return True
+# Rows in the name column that are section headers or match dates, not players
+NON_PLAYER_WORDS = ['Amichevoli', 'Torneo', 'Spring', 'Cup', 'Coppa', 'Playoff', 'Playout', 'Gironi', 'Ottavi', 'Quarti', 'Semifinale', 'Finale', 'Tamarindi']
+NON_PLAYER_RE = re.compile('|'.join(re.escape(word) for word in NON_PLAYER_WORDS))
+DATE_NAME_RE = re.compile(r'20[012]')
+
+def is_missing(value):
+    """pd.isna() for a single cell value (None, NaN or NaT), without importing pandas."""
+    return value is None or value != value
+
+def is_real_player(name, apps):
+    """
+    True if a sheet row is a player: not a section header or a match date,
+    and with appearances. real_player_mask() is the same test over a frame.
+    """
+    name = str(name).strip()
+    if DATE_NAME_RE.match(name) or NON_PLAYER_RE.search(name): return False
+    return not is_missing(apps) and str(apps).strip() != ''
+
+def real_player_mask(data):
+    """is_real_player() over the rows of a frame with 'name' and 'apps' columns."""
+    names = data['name'].astype(str).str.strip()
+    apps = data['apps']
+    return (
+        ~names.str.match(DATE_NAME_RE)
+        & ~names.str.contains(NON_PLAYER_RE)
+        & apps.notna()
+        & (apps.astype(str).str.strip() != '')
+    )
+
+def select_columns(df, skip, cols):
+    """Drops the header rows and keeps only the mapped columns, renamed."""
+    data = df.iloc[skip:, [i for i in cols if i < df.shape[1]]]
+    return data.rename(columns=cols)
+
+def to_int_column(values):
+    """Coerces a column to nullable Int64 (non-numbers become <NA>, decimals are truncated)."""
+    import numpy as np
+    import pandas as pd
+    numeric = pd.to_numeric(values, errors='coerce').astype('float64')
+    return np.trunc(numeric).astype('Int64')
+
+def coerce_int_columns(data, columns):
+    for col in columns:
+        data[col] = to_int_column(data[col]).fillna(0)
+    return data
 
 def process_player_stats(df, config):
-    data = df.iloc[config['skip']:].copy()
-    data = data.rename(columns=config['cols'])
+    data = select_columns(df, config['skip'], config['cols'])
     
     for col in REQUIRED_COLUMNS:
         if col not in data.columns:
             data[col] = '-' if col == 'assists' else 0
             
     data = data[REQUIRED_COLUMNS]
-    data = data.dropna(subset=['name'])
-    data = data[data.apply(is_real_player, axis=1)]
+    data = data[data['name'].notna()]
+    data = data[real_player_mask(data)].copy()
     
-    data['name'] = data['name'].astype(str).str.title() 
-    data['number'] = data['number'].fillna('-').astype(str).str.replace('.0', '', regex=False)
+    data['name'] = data['name'].astype(str).str.title()
+    number = data['number']
+    data['number'] = number.astype(str).where(number.notna(), '-').str.replace('.0', '', regex=False)
     
-    for col in ['apps', 'goals', 'assists', 'yellow_cards', 'red_cards']:
-        if str(data[col].iloc[0]) == '-': continue
-        data[col] = pd.to_numeric(data[col], errors='coerce').fillna(0).astype(int)
+    # Columns the season's sheet doesn't track (e.g. assists in 19/20) stay as '-'
+    tracked = set(config['cols'].values())
+    coerce_int_columns(data, [col for col in STAT_COLUMNS if col in tracked])
         
     return data.to_dict(orient='records')
 
-def process_all_time():
-    path = os.path.join(DATA_DIR, 'STATS TOTALI.xlsx')
+def process_all_time(path=None):
+    path = path or os.path.join(DATA_DIR, ALL_TIME_FILENAME)
     if not os.path.exists(path): return []
     
+    import pandas as pd
     try:
         df = pd.read_excel(path, header=None)
-        data = df.iloc[3:].copy()
-        cols = {0: 'name', 2: 'role', 11: 'total_apps', 20: 'total_goals', 29: 'total_assists'}
-        
-        clean = data.rename(columns=cols)
-        clean = clean.dropna(subset=['name'])
+        build_profile.count('rows_parsed', df.shape[0])
+        clean = select_columns(df, 3, ALL_TIME_COLUMNS)
+        clean = clean[clean['name'].notna()]
+        clean = clean[pd.to_numeric(clean['total_apps'], errors='coerce').notna()].copy()
 
-        clean['name'] = clean['name'].astype(str)
-        clean['role'] = clean['role'].astype(str).str.strip().fillna('Player')
-        
-        clean = clean[pd.to_numeric(clean['total_apps'], errors='coerce').notna()]
-        
-        clean['name'] = clean['name'].str.title()
-        
-        for c in ['total_apps', 'total_goals', 'total_assists']:
-            clean[c] = pd.to_numeric(clean[c], errors='coerce').fillna(0).astype(int)
+        clean['name'] = clean['name'].astype(str).str.title()
+        clean['role'] = clean['role'].astype(str).str.strip()
+        coerce_int_columns(clean, ['total_apps', 'total_goals', 'total_assists'])
             
         return clean[['name', 'role', 'total_apps', 'total_goals', 'total_assists']].to_dict(orient='records')
     except Exception as e:
         print(f"FATAL ERROR in Hall of Fame (process_all_time): {e}")
         return []
     
+# --- MATCH EVENT TOKENIZER ---
+# Every marker an event cell can carry, plus '(n)' goal counts, found in one scan.
+# When a cell has several markers the first type in EVENT_TYPES wins.
+EVENT_TOKEN_RE = re.compile(
+    r'(?P<saved_penalty>R PARATO)|(?P<red_card>\[R\]|\(R\))|(?P<yellow_card>\[Y\]|\(Y\))'
+    r'|(?P<penalty>\[P\]|\(P\))|\((?P<count>\d+)\)',
+    re.IGNORECASE)
+EVENT_TYPES = ('saved_penalty', 'red_card', 'yellow_card', 'penalty')
+# What is cut from the (upper-cased) cell to leave the player's name
+EVENT_MARKER_RE = {
+    'saved_penalty': re.compile(r'\[R PARATO\]'),
+    'red_card': re.compile(r'\[R\]|\(R\)'),
+    'yellow_card': re.compile(r'\[Y\]|\(Y\)'),
+    'penalty': re.compile(r'\[P\]|\(P\)'),
+}
+NOT_A_PLAYER_RE = re.compile(r'Tamarindi|FC|Club|Torneo')
+GOAL_COUNT_RE = re.compile(r'\(\d+\)')
+# Every marker and count, for the plain player name of a structured event
+EVENT_NOISE_RE = re.compile(r'[\[(]?R PARATO[\])]?|[\[(][RYP][\])]|\(\d+\)', re.IGNORECASE)
+LETTER_RE = re.compile(r'[A-Za-z]')
+
+def tokenize_event(cell):
+    """
+    Parses one event cell ('Rossi (2)', 'Bianchi [Y]', 'Verdi [R parato]', ...).
+    Returns (event, label) or None: `event` is {"type", "player", "count"}
+    (type 'goal', 'penalty', 'yellow_card', 'red_card' or 'saved_penalty';
+    count is the '(n)' goal count, else 1) and `label` is how the match's
+    EVENT_LISTS list spells it ('Rossi (2)', 'Neri (Pen)', 'Bianchi').
+    """
+    text = cell.replace('  ', ' ').strip()
+    if not text or NOT_A_PLAYER_RE.search(text):
+        return None
+    
+    found = {}
+    for token in EVENT_TOKEN_RE.finditer(text):
+        found.setdefault(token.lastgroup, token)
+    kind = next((k for k in EVENT_TYPES if k in found), 'goal')
+    count = int(found['count'].group('count')) if 'count' in found else 1
+    
+    if kind == 'goal':
+        label = text.title()
+        if not (GOAL_COUNT_RE.search(label) or LETTER_RE.match(label)):
+            return None
+    else:
+        label = EVENT_MARKER_RE[kind].sub('', text.upper()).strip().title()
+        if not label:
+            return None
+    player = ' '.join(EVENT_NOISE_RE.sub(' ', label).split())
+    if kind == 'penalty':
+        label += ' (Pen)'
+    return {"type": kind, "player": player, "count": count}, label
+
 # --- CORE MATCH LOGIC FIX ---
-def extract_matches(df, season_key):
-    matches = []
-    current_match = None
+class MatchExtractor:
+    """
+    Row-at-a-time match state machine. Feed it the sheet's rows in order
+    (a pandas row or a plain tuple, indexed by column number), then call
+    finish() to get the season's matches.
+    """
     
-    df_iter = df.reset_index(drop=True)
+    def __init__(self, season_key):
+        self.season_key = season_key
+        self.matches = []
+        self.current_match = None
+        self.tamarindi_is_home = False
     
-    for index, row in df_iter.iterrows():
+    def feed(self, row):
         val0 = str(row[0]).strip()
         is_date = False
         try:
@@ -99,43 +237,43 @@ def extract_matches(df, season_key):
             pass
 
         if is_date:
-            if current_match: matches.append(current_match)
+            if self.current_match: self.matches.append(self.current_match)
             
             # --- HOME/AWAY LOGIC ---
-            tamarindi_is_home = False
+            self.tamarindi_is_home = False
             opponent = 'Unknown'
             
-            if season_key == 'season_19_20':
+            if self.season_key == 'season_19_20':
                 # 19/20 Format: Date (0) | Team A (2) | Score A (4) | - (5) | Score B (6) | Team B (7)
                 
                 # Check Col 2 for Tamarindi (Home)
                 if str(row[2]).strip().startswith('Tamarindi F.C.') or str(row[2]).strip().startswith('Tamarindi FC'):
-                    tamarindi_is_home = True
-                    opponent = str(row[7]).strip() if not pd.isna(row[7]) else 'Unknown'
+                    self.tamarindi_is_home = True
+                    opponent = str(row[7]).strip() if not is_missing(row[7]) else 'Unknown'
                 # Check Col 7 for Tamarindi (Away)
                 elif str(row[7]).strip().startswith('Tamarindi F.C.') or str(row[7]).strip().startswith('Tamarindi FC'):
-                    tamarindi_is_home = False
-                    opponent = str(row[2]).strip() if not pd.isna(row[2]) else 'Unknown'
+                    self.tamarindi_is_home = False
+                    opponent = str(row[2]).strip() if not is_missing(row[2]) else 'Unknown'
                 
                 # Score is always Col 4 - Col 6
-                score = f"{str(row[4]).strip()}-{str(row[6]).strip()}" if not pd.isna(row[4]) and not pd.isna(row[6]) else '?-?'
+                score = f"{str(row[4]).strip()}-{str(row[6]).strip()}" if not is_missing(row[4]) and not is_missing(row[6]) else '?-?'
                 
             else:
                 # Other Seasons Format: Date (0) | Team A (2) | Score (4) | Opponent (5)
                 
                 # Check Col 2 for Tamarindi (Home)
                 if str(row[2]).strip().startswith('Tamarindi F.C.') or str(row[2]).strip().startswith('Tamarindi FC'):
-                    tamarindi_is_home = True
-                    opponent = str(row[5]).strip() if not pd.isna(row[5]) else 'Unknown'
+                    self.tamarindi_is_home = True
+                    opponent = str(row[5]).strip() if not is_missing(row[5]) else 'Unknown'
                 # Check Col 5 for Tamarindi (Away)
                 elif str(row[5]).strip().startswith('Tamarindi F.C.') or str(row[5]).strip().startswith('Tamarindi FC'):
-                    tamarindi_is_home = False
-                    opponent = str(row[2]).strip() if not pd.isna(row[2]) else 'Unknown'
+                    self.tamarindi_is_home = False
+                    opponent = str(row[2]).strip() if not is_missing(row[2]) else 'Unknown'
                 else: # Fallback - Assume Away
-                    tamarindi_is_home = False
-                    opponent = str(row[2]).strip() if not pd.isna(row[2]) else 'Unknown'
+                    self.tamarindi_is_home = False
+                    opponent = str(row[2]).strip() if not is_missing(row[2]) else 'Unknown'
                     
-                score = str(row[4]).strip() if not pd.isna(row[4]) else '?-?'
+                score = str(row[4]).strip() if not is_missing(row[4]) else '?-?'
             
             # --- RESULT CALCULATION (Based on Score) ---
             result = '?'
@@ -146,8 +284,8 @@ def extract_matches(df, season_key):
                 home_score = int(score_parts[0].strip())
                 away_score = int(score_parts[1].strip())
                 
-                tamarindi_score = home_score if tamarindi_is_home else away_score
-                opponent_score = away_score if tamarindi_is_home else home_score
+                tamarindi_score = home_score if self.tamarindi_is_home else away_score
+                opponent_score = away_score if self.tamarindi_is_home else home_score
 
                 if tamarindi_score > opponent_score: result = 'W'
                 elif tamarindi_score < opponent_score: result = 'L'
@@ -155,7 +293,7 @@ def extract_matches(df, season_key):
             
             date_str = str(row[0]).split(' ')[0] 
 
-            current_match = {
+            self.current_match = {
                 "date": date_str,
                 "opponent": opponent.replace('Tamarindi FC', '').strip(),
                 "score": score,
@@ -164,179 +302,220 @@ def extract_matches(df, season_key):
                 "yellow_cards_recipients": [], 
                 "red_cards_recipients": [], 
                 "saved_penalty_goalkeepers": [], # <-- NEW LIST
+                "events": [],  # the same events, structured (see tokenize_event)
                 "shootout_score": shootout_score,
-                "season": season_key,
-                "home_status": "In Casa" if tamarindi_is_home else "Fuori Casa"
+                "season": self.season_key,
+                "home_status": "In Casa" if self.tamarindi_is_home else "Fuori Casa"
             }
         
-        elif current_match:
+        elif self.current_match:
             # --- PENALTY SHOOTOUT DETECTION ---
-            if pd.notna(row[4]) and 'dcr' in str(row[4]).lower():
+            if not is_missing(row[4]) and 'dcr' in str(row[4]).lower():
                 # Shootout logic remains the same (Correctly checks next row)
-                current_match['shootout_score'] = str(row[4]).strip()
+                self.current_match['shootout_score'] = str(row[4]).strip()
                 shootout_parts = str(row[4]).split('+')[-1].strip().split('-')
                 
                 if len(shootout_parts) == 2 and shootout_parts[0].strip().isdigit() and shootout_parts[1].strip().isdigit():
                     home_so_score = int(shootout_parts[0].strip())
                     away_so_score = int(shootout_parts[1].strip())
 
-                    if tamarindi_is_home:
+                    if self.tamarindi_is_home:
                         tamarindi_so_score = home_so_score
                     else:
                         tamarindi_so_score = away_so_score
 
-                    if tamarindi_so_score > int(shootout_parts[1-int(tamarindi_is_home)]):
-                        current_match['result'] = 'W(SO)'
+                    if tamarindi_so_score > int(shootout_parts[1-int(self.tamarindi_is_home)]):
+                        self.current_match['result'] = 'W(SO)'
                     else: 
-                        current_match['result'] = 'L(SO)'
+                        self.current_match['result'] = 'L(SO)'
                 
-                continue 
+                return 
             
             # --- Normal Card/Goal Parsing ---
-            # 19/20 format places all player events (scorers/cards) in Col 4 (Home) or Col 6 (Away)
-            if season_key == 'season_19_20':
-                potential_scorer_home = str(row[4]).strip() if not pd.isna(row[4]) else ''
-                potential_scorer_away = str(row[6]).strip() if not pd.isna(row[6]) else ''
-                scorer_col_value = potential_scorer_home if current_match['home_status'] == 'In Casa' else potential_scorer_away
-            else:
-                # Other seasons use Col 2 (Home) or Col 5 (Away)
-                potential_scorer_home = str(row[2]).strip() if not pd.isna(row[2]) else ''
-                potential_scorer_away = str(row[5]).strip() if not pd.isna(row[5]) else ''
-                scorer_col_value = potential_scorer_home if current_match['home_status'] == 'In Casa' else potential_scorer_away
-            
-            if scorer_col_value and not pd.isna(scorer_col_value):
-                scorer_col_value = scorer_col_value.replace('  ', ' ').strip()
-                
-                if not any(word in scorer_col_value for word in ['Tamarindi', 'FC', 'Club', 'Torneo']):
-                    
-                    original_value = scorer_col_value.title()
-                    name_only = scorer_col_value.upper()
-                    
-                    # 1. Check for SAVED Penalty [R parato] (NEW LOGIC)
-                    if 'R PARATO' in name_only:
-                        name_to_add = name_only.replace('[R PARATO]', '').strip().title()
-                        if name_to_add:
-                             current_match['saved_penalty_goalkeepers'].append(name_to_add)
-
-                    # 2. Check for Red Card [R]
-                    elif '[R]' in name_only or '(R)' in name_only:
-                         name_to_add = name_only.replace('[R]', '').replace('(R)', '').strip().title()
-                         if name_to_add:
-                              current_match['red_cards_recipients'].append(name_to_add)
-                    
-                    # 3. Check for Yellow Card [Y]
-                    elif '[Y]' in name_only or '(Y)' in name_only:
-                         name_to_add = name_only.replace('[Y]', '').replace('(Y)', '').strip().title()
-                         if name_to_add:
-                              current_match['yellow_cards_recipients'].append(name_to_add)
-                    
-                    # 4. Check for Penalty Goal [P]
-                    elif '[P]' in name_only or '(P)' in name_only:
-                         name_to_add = name_only.replace('[P]', '').replace('(P)', '').strip().title()
-                         if name_to_add:
-                              current_match['scorers'].append(name_to_add + ' (Pen)')
-
-                    # 5. Normal Goal (Any name with or without numbers, not stripped by a card marker)
-                    elif re.search(r'\(\d+\)', original_value) or re.match(r'[A-Za-z]', original_value):
-                         current_match['scorers'].append(original_value)
-            
+            # 19/20 format places all player events (scorers/cards) in Col 4 (Home) or Col 6 (Away),
+            # other seasons use Col 2 (Home) or Col 5 (Away)
+            home_col, away_col = (4, 6) if self.season_key == 'season_19_20' else (2, 5)
+            value = row[home_col] if self.current_match['home_status'] == 'In Casa' else row[away_col]
+            if is_missing(value):
+                return
+            parsed = tokenize_event(str(value))
+            if parsed:
+                event, label = parsed
+                self.current_match[EVENT_LISTS[event['type']]].append(label)
+                self.current_match['events'].append(event)
 
-    if current_match: matches.append(current_match)
-    return [m for m in matches if m['opponent'] not in ('Unknown', '') and m['score'] != '?']
+    def finish(self):
+        if self.current_match: self.matches.append(self.current_match)
+        self.current_match = None
+        return [m for m in self.matches if m['opponent'] not in ('Unknown', '') and m['score'] != '?']
 
-# --- NEW: STRICT YOUTUBE MATCHER (No Fuzzy) ---
-def fetch_youtube_videos_and_link(all_matches, api_key, channel_id):
-    """Fetches videos and links them using strict Date + Score + Name filtering."""
+def extract_matches(df, season_key):
+    extractor = MatchExtractor(season_key)
     
-    # 1. Get Uploads Playlist ID
-    # (This part assumes you have the CHANNEL_ID_VAR and requests imported)
-    if not channel_id:
-        print("Error: YOUTUBE_CHANNEL_ID not set.")
-        return all_matches
-
-    url = f"https://www.googleapis.com/youtube/v3/channels?part=contentDetails&id={channel_id}&key={api_key}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Error fetching channel details: {response.text}")
-        return all_matches
+    df_iter = df.reset_index(drop=True)
     
-    channel_data = response.json()
-    if not channel_data.get('items'):
-        return all_matches
-
-    uploads_playlist_id = channel_data['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+    for index, row in df_iter.iterrows():
+        extractor.feed(row)
     
-    # 2. Fetch Videos (Only from 23/24 season onwards)
-    all_videos = []
-    next_page_token = None
-    start_date = datetime.datetime(2023, 8, 1, 0, 0, 0, tzinfo=datetime.timezone.utc)
+    return extractor.finish()
 
-    while True:
-        playlist_url = f"https://www.googleapis.com/youtube/v3/playlistItems?part=snippet&maxResults=50&playlistId={uploads_playlist_id}&key={api_key}"
-        if next_page_token:
-            playlist_url += f"&pageToken={next_page_token}"
-            
-        response = requests.get(playlist_url)
-        if response.status_code != 200:
-            break
-            
-        playlist_data = response.json()
+# --- STREAMING WORKBOOK READER ---
+# Strings that pd.read_excel turns into NaN by default (its `na_values`)
+PANDAS_NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+NAN = float('nan')
+
+def _convert_cell(value):
+    """Converts an openpyxl value the same way pd.read_excel does (empty -> NaN, 3.0 -> 3)."""
+    if value is None:
+        return NAN
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str) and value in PANDAS_NA_STRINGS:
+        return NAN
+    return value
+
+def iter_sheet_rows(path, min_width=0):
+    """
+    Yields the first sheet of a workbook one row at a time as tuples, with the
+    same cell values pd.read_excel(header=None) would put in the DataFrame.
+    Uses openpyxl's read_only mode, so the sheet is never held in memory.
+    Rows are padded with NaN to at least `min_width` columns.
+    """
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[0]
+        for values in ws.iter_rows(values_only=True):
+            row = tuple(_convert_cell(v) for v in values)
+            if len(row) < min_width:
+                row += (NAN,) * (min_width - len(row))
+            yield row
+    finally:
+        wb.close()
+
+def _to_int(value):
+    """Scalar version of pd.to_numeric(errors='coerce').fillna(0).astype(int)."""
+    if isinstance(value, bool):
+        return int(value)
+    if not isinstance(value, (int, float)):
+        import pandas as pd  # text in a stats cell: coerce it exactly like the DataFrame path
+        value = pd.to_numeric(value, errors='coerce')
+    return 0 if is_missing(value) else int(value)
+
+class PlayerStatsExtractor:
+    """
+    Row-at-a-time version of process_player_stats(): feed it every row of the
+    sheet (including the `skip` header rows), then call finish().
+    Produces the same records as the DataFrame path.
+    """
+    
+    def __init__(self, config):
+        self.config = config
+        self.records = []
+        self.rows_seen = 0
+        # Columns the season's sheet doesn't track (e.g. assists in 19/20) stay as '-'
+        tracked = set(config['cols'].values())
+        self.int_columns = [col for col in STAT_COLUMNS if col in tracked]
+    
+    def feed(self, row):
+        self.rows_seen += 1
+        if self.rows_seen <= self.config['skip']:
+            return
         
-        for item in playlist_data.get('items', []):
-            pub_str = item['snippet']['publishedAt'].replace('Z', '+00:00')
-            published_at = datetime.datetime.fromisoformat(pub_str)
-            
-            if published_at >= start_date:
-                all_videos.append({
-                    'title': item['snippet']['title'],
-                    'videoId': item['snippet']['resourceId']['videoId'],
-                    'publishedAt': published_at
-                })
-            elif published_at < start_date:
-                next_page_token = None 
-                break
+        values = {col: '-' if col == 'assists' else 0 for col in REQUIRED_COLUMNS}
+        for index, col in self.config['cols'].items():
+            values[col] = row[index] if index < len(row) else NAN
         
-        next_page_token = playlist_data.get('nextPageToken')
-        if not next_page_token:
-            break
+        if is_missing(values['name']) or not is_real_player(values['name'], values['apps']):
+            return
+        
+        number = '-' if is_missing(values['number']) else values['number']
+        record = {
+            "name": str(values['name']).title(),
+            "number": str(number).replace('.0', '')
+        }
+        for col in STAT_COLUMNS:
+            record[col] = _to_int(values[col]) if col in self.int_columns else values[col]
+        self.records.append(record)
+    
+    def finish(self):
+        return self.records
 
-    print(f"Found {len(all_videos)} potential videos. Linking to matches...")
+def stream_season(path, config):
+    """Single pass over a season workbook feeding both the stats and the match extractors."""
+    stats = PlayerStatsExtractor(config)
+    matches = MatchExtractor(config['key'])
+    min_width = max(max(config['cols']), 7) + 1
+    
+    for row in iter_sheet_rows(path, min_width=min_width):
+        stats.feed(row)
+        matches.feed(row)
+    
+    build_profile.count('rows_parsed', stats.rows_seen)
+    return {"stats": stats.finish(), "matches": matches.finish()}
 
-    # 3. Link Videos to Matches (Strict Filtering)
-    for match in all_matches:
-        
-        try:
-            match_date = datetime.datetime.strptime(match['date'], '%Y-%m-%d').date()
-        except:
-            continue 
+# --- YOUTUBE SYNC + MATCH LINKING ---
+def sync_youtube(force=False, offline=False):
+    """
+    Syncs the channel's uploads into the local video index (only new uploads
+    are fetched) and returns every known video, or None without API keys.
+    offline=True skips the API and returns the videos already in the index.
+    """
+    youtube_api_key = os.environ.get('YOUTUBE_API_KEY')
+    youtube_channel_id = os.environ.get('TORNEICONTI_CHANNEL_ID')
+    if not (youtube_api_key and youtube_channel_id):
+        if not offline:
+            print("WARNING: YOUTUBE_API_KEY or CHANNEL_ID not found in environment variables. Skipping video fetch.")
+        return None
 
-        for video in all_videos:
+    import youtube_sync
+    if offline:
+        all_videos = youtube_sync.VideoIndex(VIDEO_INDEX_FILE).load(youtube_channel_id).videos()
+    else:
+        print("API keys found. Fetching YouTube video list...")
+        client = youtube_sync.YouTubeClient(youtube_api_key)
+        all_videos = youtube_sync.sync_videos(youtube_api_key, youtube_channel_id, VIDEO_INDEX_FILE,
+                                              force=force, client=client)
+        build_profile.count('http_requests', client.requests_made)
+    build_profile.count('videos_known', len(all_videos))
+    return all_videos
 
-            video_date = video['publishedAt'].date()
-            
-            # FILTER 1: Date Window (Previous, Same day or Next day only)
-            delta = abs(video_date - match_date).days
-            
-            if delta > 1:
-                continue 
-            
-            video_title_clean = video['title'].lower().replace(' ', '')
+def link_youtube(all_matches, all_videos):
+    """
+    Links the videos (if any) to the matches by date window, opponent name
+    and score (see video_linker.py) and sorts the matches newest first.
+    """
+    if all_videos is not None:
+        print(f"Found {len(all_videos)} potential videos. Linking to matches...")
+        report = video_linker.link_videos(all_matches, all_videos)
+        build_profile.count('matches_linked', report['linked'])
+        print(f"Linked videos to {report['linked']} matches "
+              f"({len(report['unmatched_matches'])} matches without video, "
+              f"{len(report['unmatched_videos'])} unlinked videos, {len(report['ambiguous'])} ambiguous).")
 
-            tamarindi_names = ['tamarindi', 'palermo', 'tamardini']
-            
-            if any(name in video_title_clean for name in tamarindi_names):
-                match['videoId'] = video['videoId']
-                break # Found the exact match, stop checking other videos
-        
+        try:
+            write_atomic(VIDEO_LINK_REPORT_FILE, json.dumps(report, indent=4, ensure_ascii=False).encode('utf-8'))
+        except OSError as e:
+            print(f"Could not write video link report: {e}")
+
+    # Finalize Matches (Sorts and saves all_matches, now with video IDs)
+    all_matches.sort(key=lambda x: x['date'], reverse=True)
     return all_matches
 
 # --- GALLERY SCANNER ---
-def scan_gallery_images():
-    """Scans the images/gallery folder and returns a list of filenames."""
+def scan_gallery_images(jobs=1, avif=False, legacy=False, pool=None):
+    """
+    Scans the images/gallery folder, refreshes the resized variants and returns
+    one entry per photo (size, placeholder and srcset, see thumbnails.py).
+    legacy=True also keeps the thumbnails/<file> copies the --legacy-cache frontend loads.
+    The variants are made on `pool` if given, else with up to `jobs` processes.
+    """
     
     # Path to the gallery folder (relative to the repo root)
-    # We go up one level from 'data/' to root, then into 'images/gallery'
-    gallery_dir = os.path.join(BASE_DIR, 'images', 'gallery')
+    gallery_dir = GALLERY_DIR
 
     thumb_dir = os.path.join(gallery_dir, "thumbnails")
     
@@ -344,41 +523,30 @@ def scan_gallery_images():
         print(f"Gallery folder not found at: {gallery_dir}")
         return []
     
-    if not os.path.exists(thumb_dir):
-        os.makedirs(thumb_dir)
-    
     images = []
     valid_extensions = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
     
     for filename in os.listdir(gallery_dir):
         if filename.lower().endswith(valid_extensions):
-            # We just need the filename, the frontend knows the path
             images.append(filename)
-
-            # --- THUMBNAIL GENERATION ---
-            original_path = os.path.join(gallery_dir, filename)
-            thumb_path = os.path.join(thumb_dir, filename)
-            
-            # Create thumbnail if it doesn't exist
-            if not os.path.exists(thumb_path):
-                try:
-                    with Image.open(original_path) as img:
-                        # Convert to RGB to avoid errors with PNGs/Transparency
-                        if img.mode in ("RGBA", "P"): 
-                            img = img.convert("RGB")
-                        
-                        # Resize to max 400x400 (good for grid)
-                        img.thumbnail((400, 400)) 
-                        
-                        # Save compressed
-                        img.save(thumb_path, quality=80, optimize=True)
-                except Exception as e:
-                    print(f" ! Error processing {filename}: {e}")
             
     # Sort alphabetically or by modification time if you prefer
     images.sort()
-    print(f"Found {len(images)} images in gallery.")
-    return images
+    
+    # --- VARIANT GENERATION (only new/changed originals, see thumbnails.py) ---
+    import thumbnails
+    entries, result = thumbnails.update_gallery(
+        gallery_dir, thumb_dir, 'images/gallery/thumbnails/', images, THUMBNAIL_STATE_FILE,
+        jobs=jobs, formats=thumbnails.available_formats(with_avif=avif), pool=pool, legacy=legacy
+    )
+    for filename, error in result['errors'].items():
+        print(f" ! Error processing {filename}: {error}")
+    build_profile.count('gallery_images', len(images))
+    build_profile.count('thumbnails_generated', result['generated'])
+    
+    print(f"Found {len(images)} images in gallery "
+          f"({result['generated']} resized, {result['removed']} stale files removed).")
+    return entries
 
 
 # --- DECLARATIONS SCANNER (Metadata Header Version) ---
@@ -388,7 +556,7 @@ def scan_declarations():
     Parses 'Title:', 'Date:', and 'Author:' from the top of the file.
     """
     
-    decl_dir = os.path.join(BASE_DIR, 'declarations')
+    decl_dir = DECLARATIONS_DIR
     
     if not os.path.exists(decl_dir):
         return []
@@ -457,49 +625,635 @@ def scan_declarations():
                 
     # Sort by Date (Newest first)
     posts.sort(key=lambda x: x['date'], reverse=True)
+    build_profile.count('declarations', len(posts))
     print(f"Found {len(posts)} declarations.")
     return posts
 
-# --- MAIN EXECUTION ---
-if __name__ == "__main__":
-    print("Starting conversion...")
-    final_data = {}
-    all_matches = []
+# --- ALL-TIME TOTALS CHECK ---
+def check_all_time_totals(final_data):
+    """
+    Compares the hand-maintained STATS TOTALI.xlsx with the careers summed
+    from the season sheets, prints a summary and writes the differences to
+    .build_cache/totals_check.json.
+    """
+    if not final_data.get('all_time'):
+        return []
+    seasons = [c['key'] for c in FILES_CONFIG if c['key'] in final_data]
+    differences = aggregates.compare_all_time(aggregates.careers(final_data, seasons), final_data['all_time'])
+    
+    players = len({d['name'] for d in differences})
+    print(f"All-time totals check: {players} of {len(final_data['all_time'])} players differ from the season sheets.")
+    for d in differences[:5]:
+        if d['column'] == 'missing':
+            print(f"  {d['name']}: not found in any season sheet")
+        else:
+            print(f"  {d['name']}: {d['column']} {d['sheet']} in {ALL_TIME_FILENAME}, {d['seasons']} in the seasons")
+    if len(differences) > 5:
+        print(f"  ... see {TOTALS_CHECK_REPORT_FILE}")
+    
+    try:
+        write_atomic(TOTALS_CHECK_REPORT_FILE, json.dumps(differences, indent=1, ensure_ascii=False).encode('utf-8'))
+    except OSError as e:
+        print(f"Could not write totals check report: {e}")
+    return differences
+
+# --- INCREMENTAL BUILD MANIFEST ---
+def input_hash(path, config=None):
+    """
+    Cache key for one input workbook: its content plus the column layout
+    used to read it, so editing FILES_CONFIG also invalidates the entry.
+    """
+    digest = hashlib.sha256(file_hash(path).encode())
+    if config is not None:
+        digest.update(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def load_manifest(force=False):
+    """
+    Loads the manifest of previously parsed inputs. The manifest is tied to
+    the hash of this script and of stats_store.py (which defines the stat
+    columns and event lists the parsers use), so any change to the parsing
+    code starts over.
+    """
+    digest = hashlib.sha256()
+    for source in (os.path.abspath(__file__), os.path.abspath(stats_store.__file__)):
+        digest.update(file_hash(source).encode())
+    code_hash = digest.hexdigest()
+    empty = {"code_hash": code_hash, "inputs": {}}
+    
+    if force or not os.path.exists(MANIFEST_FILE):
+        return empty
+    
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable build manifest: {e}")
+        return empty
+    
+    if manifest.get('code_hash') != code_hash or not isinstance(manifest.get('inputs'), dict):
+        return empty
+    return manifest
+
+def save_manifest(manifest):
+    """Writes the manifest atomically (temp file + rename)."""
+    write_atomic(MANIFEST_FILE, json.dumps(manifest).encode('utf-8'))
+
+def cached_output(manifest, key, digest):
+    """Returns the stored output for an input if its hash is unchanged, else None."""
+    entry = manifest['inputs'].get(key)
+    if entry and entry.get('hash') == digest:
+        return entry.get('output')
+    return None
+
+def store_output(manifest, key, filename, digest, output):
+    manifest['inputs'][key] = {"filename": filename, "hash": digest, "output": output}
+
+# --- SHARDED OUTPUT ---
+def encode_compact(payload):
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def build_shards(final_data, sections=SECTIONS):
+    """
+    Splits the build output into the files each page loads:
+    stats/<season>, stats/all_time, matches/<season>, gallery, declarations,
+    the precomputed aggregates (aggregates/*, orders/<table>) and the search
+    index (search/docs, search/terms/<prefix>).
+    Only the shards of `sections` (see SECTION_SHARDS) are built.
+    """
+    seasons = [c['key'] for c in FILES_CONFIG if c['key'] in final_data]
+    shards = {}
+    
+    if 'stats' in sections:
+        for key in seasons:
+            shards[f'stats/{key}'] = final_data[key]
+        shards['stats/all_time'] = final_data.get('all_time', [])
+    
+    if 'matches' in sections:
+        matches_by_season = {key: [] for key in seasons}
+        for match in final_data.get('matches', []):
+            matches_by_season.setdefault(match['season'], []).append(match)
+        for key, matches in matches_by_season.items():
+            shards[f'matches/{key}'] = matches
+    
+    if 'gallery' in sections:
+        shards['gallery'] = final_data.get('gallery', [])
+    if 'declarations' in sections:
+        shards['declarations'] = final_data.get('declarations', [])
+    
+    shards.update(aggregates.build_aggregate_shards(final_data, seasons, sections))
+    if set(sections) & set(SEARCH_SECTIONS):
+        shards.update(search_index.build_search_shards(final_data, seasons))
+    return shards
+
+def read_shards_manifest():
+    """Returns the published data/shards/manifest.json, or None if there is none (or it can't be read)."""
+    try:
+        with open(SHARDS_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def read_shard(manifest, name):
+    """Loads one published shard as written (still encoded if the manifest is columnar), or None."""
+    entry = manifest['shards'].get(name)
+    if entry is None:
+        return None
+    with open(os.path.join(SHARDS_DIR, entry['file']), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_published_data(sections):
+    """
+    Reads `sections` back from the last build, in the shape build_site()
+    returns them: the stats (season keys and 'all_time') and the matches
+    (newest first) from the stats store, the gallery and declarations from
+    the published shards. Returns None if those haven't been published yet.
+    """
+    data = {}
+    stored = [section for section in sections if section in ('stats', 'matches')]
+    if stored:
+        conn = stats_store.open_store(STATS_DB_FILE)
+        try:
+            data.update(stats_store.export(conn, stored))
+        finally:
+            conn.close()
+    
+    published = [name for name in ('gallery', 'declarations') if name in sections]
+    if published:
+        manifest = read_shards_manifest()
+        if manifest is None:
+            return None
+        strings = read_shard(manifest, 'strings') if manifest.get('encoding') == 'columnar' else None
+        for name in published:
+            data[name] = compact_encoding.decode_table(read_shard(manifest, name), strings) or []
+    return data
+
+def write_shards(shards, compact=False, replace=None):
+    """
+    Writes each shard compact-encoded as <name>.<hash>.json and a manifest
+    mapping shard names to those files. Shard files never change once written,
+    so browsers can cache them forever; only manifest.json must be revalidated.
+    Files no longer referenced by the manifest are removed.
+    
+    compact=True stores record lists as columnar tables with a shared string
+    table (see compact_encoding.py) and writes precompressed .gz/.br siblings.
+    
+    replace=(name prefixes) updates the published manifest in place instead:
+    its shards matching a prefix are replaced by `shards`, the others are kept.
+    """
+    seasons = [c['key'] for c in FILES_CONFIG if f"stats/{c['key']}" in shards]
+    entries = {}
+    strings = None
+    if replace is not None:
+        published = read_shards_manifest()
+        encoding = "columnar" if compact else "records"
+        if published is None or published.get('encoding') != encoding:
+            raise ValueError(f"no published {encoding} shards in {SHARDS_DIR} to update; run 'build all'"
+                             + (" with the same --compact setting" if published else ""))
+        if not any(name.startswith('stats/') for name in shards):
+            seasons = published['seasons']
+        entries = {name: entry for name, entry in published['shards'].items()
+                   if not name.startswith(tuple(replace)) and name != 'strings'}
+        if compact:
+            strings = read_shard(published, 'strings')
+    if compact:
+        shards = compact_encoding.encode_shards(shards, strings)
+    
+    referenced = {os.path.normpath(SHARDS_MANIFEST_FILE)}
+    for entry in entries.values():
+        path = os.path.join(SHARDS_DIR, entry['file'])
+        referenced.update(os.path.normpath(path + extension) for extension in ('', '.gz', '.br'))
+    for name, payload in shards.items():
+        body = encode_compact(payload)
+        digest = hashlib.sha256(body).hexdigest()
+        filename = f"{name}.{digest[:12]}.json"
+        path = os.path.join(SHARDS_DIR, filename)
+        if not os.path.exists(path):
+            write_atomic(path, body)
+        entries[name] = {"file": filename, "hash": digest, "bytes": len(body)}
+        referenced.add(os.path.normpath(path))
+        
+        if compact:
+            for extension, compressed in compact_encoding.precompressed_siblings(body).items():
+                if not os.path.exists(path + extension):
+                    write_atomic(path + extension, compressed)
+                entries[name][f"bytes{extension}"] = len(compressed)
+                referenced.add(os.path.normpath(path + extension))
+    
+    manifest = {
+        "version": 1,
+        "encoding": "columnar" if compact else "records",
+        "seasons": seasons,
+        "shards": entries
+    }
+    write_atomic(SHARDS_MANIFEST_FILE, json.dumps(manifest, indent=1).encode('utf-8'))
+    
+    for root, _, files in os.walk(SHARDS_DIR):
+        for filename in files:
+            path = os.path.normpath(os.path.join(root, filename))
+            if filename.endswith(('.json', '.json.gz', '.json.br')) and path not in referenced:
+                os.remove(path)
+    
+    total = sum(e['bytes'] for e in entries.values())
+    build_profile.count('shards', len(entries))
+    build_profile.count('shard_bytes', total)
+    if replace is not None:
+        print(f"Updated {len(shards)} of {len(entries)} shards ({total / 1024:.1f} KiB) in {SHARDS_DIR}")
+    else:
+        print(f"Wrote {len(entries)} shards ({total / 1024:.1f} KiB) to {SHARDS_DIR}")
+    if compact:
+        total_gz = sum(e['bytes.gz'] for e in entries.values())
+        print(f"  gzip: {total_gz / 1024:.1f} KiB" + ("" if compact_encoding.brotli else " (install 'brotli' for .br files)"))
+    return manifest
+
+# --- STATS STORE ---
+def update_store(final_data, sections, reset=False):
+    """
+    Writes the 'stats' and/or 'matches' of final_data to the SQLite store and
+    replaces them in final_data with what the store gives back, so the JSON
+    output is a view of the store. reset=True (full builds) starts the store over.
+    Saving the stats re-links the match events to the players, so the
+    matches come back with them.
+    """
+    sections = [section for section in sections if section in ('stats', 'matches')]
+    aliases = player_identity.load_aliases(ALIASES_FILE)
+    conn = stats_store.open_store(STATS_DB_FILE, reset=reset)
+    try:
+        if 'stats' in sections:
+            seasons = [c['key'] for c in FILES_CONFIG if c['key'] in final_data]
+            stats_store.save_stats(conn, final_data, seasons, aliases)
+        if 'matches' in sections:
+            stats_store.save_matches(conn, final_data['matches'], aliases)
+        final_data.update(stats_store.export(conn, ('stats', 'matches') if 'stats' in sections else sections))
+    finally:
+        conn.close()
+
+# --- WORKBOOK INGESTION ---
+def parse_season(config, reader='stream', path=None):
+    """
+    Reads one season workbook (config['filename'] in DATA_DIR, unless `path`
+    is given) and returns its player stats and matches.
+    reader='stream' walks the sheet row by row; reader='pandas' loads it into a DataFrame.
+    """
+    path = path or os.path.join(DATA_DIR, config['filename'])
+    if reader == 'stream':
+        output = stream_season(path, config)
+    else:
+        import pandas as pd
+        df = pd.read_excel(path, header=None)
+        build_profile.count('rows_parsed', df.shape[0])
+        output = {
+            "stats": process_player_stats(df, config),
+            "matches": extract_matches(df, config['key'])
+        }
+    build_profile.count('players_parsed', len(output['stats']))
+    build_profile.count('matches_extracted', len(output['matches']))
+    return output
+
+def plan_ingest(manifest, reader='stream', all_time=True):
+    """
+    Sorts the workbooks into those the manifest has an up-to-date result for
+    and those to parse. all_time=False skips STATS TOTALI.xlsx (not needed
+    for the matches). The tasks name their files: workers started by spawn
+    only see this module's defaults.
+    Returns (tasks [(key, filename, digest, function, args)], {key: cached output}).
+    """
+    tasks = []
+    outputs = {}
     
     for config in FILES_CONFIG:
         path = os.path.join(DATA_DIR, config['filename'])
         if not os.path.exists(path): continue
-        
         try:
-            df = pd.read_excel(path, header=None)
-            final_data[config['key']] = process_player_stats(df, config)
-            season_matches = extract_matches(df, config['key'])
-            all_matches.extend(season_matches)
-            
-        except Exception as e:
+            digest = input_hash(path, config)
+        except OSError as e:
             print(f"Error processing {config['key']}: {e}")
+            continue
+        
+        output = cached_output(manifest, config['key'], digest)
+        if output is None:
+            tasks.append((config['key'], config['filename'], digest, parse_season, (config, reader, path)))
+        else:
+            print(f"Unchanged: {config['filename']} (using cached result)")
+            outputs[config['key']] = output
     
-    final_data['all_time'] = process_all_time()
+    all_time_path = os.path.join(DATA_DIR, ALL_TIME_FILENAME)
+    if all_time and os.path.exists(all_time_path):
+        digest = input_hash(all_time_path)
+        output = cached_output(manifest, 'all_time', digest)
+        if output is None:
+            tasks.append(('all_time', ALL_TIME_FILENAME, digest, process_all_time, (all_time_path,)))
+        else:
+            print(f"Unchanged: {ALL_TIME_FILENAME} (using cached result)")
+            outputs['all_time'] = output
+    
+    build_profile.count('workbooks_cached', len(outputs))
+    return tasks, outputs
+
+def parse_workbook(func, *func_args):
+    """
+    Runs one parse task (in a worker process). Returns (output, None), or
+    (None, the error): one unreadable workbook mustn't stop the build.
+    """
+    try:
+        return func(*func_args), None
+    except Exception as e:
+        return None, e
+
+def finish_ingest(manifest, tasks, cached, *parsed):
+    """
+    Stores the parsed results (one (output, error) per task) in the manifest
+    and merges everything in FILES_CONFIG order, so the output doesn't depend
+    on which parse finished first.
+    Returns (data keyed by season plus 'all_time', list of all matches).
+    """
+    outputs = dict(cached)
+    errors = {}
+    for (key, filename, digest, _, _), (output, error) in zip(tasks, parsed):
+        if error is not None:
+            errors[key] = error
+            continue
+        outputs[key] = output
+        # process_all_time() reports its own errors and returns []; don't cache a failed parse
+        if key != 'all_time' or output:
+            store_output(manifest, key, filename, digest, output)
+    
+    # Merge in a fixed order (and report errors per season, in that same order)
+    season_data = {}
+    all_matches = []
+    for config in FILES_CONFIG:
+        key = config['key']
+        if key in errors:
+            print(f"Error processing {key}: {errors[key]}")
+        elif key in outputs:
+            season_data[key] = outputs[key]['stats']
+            # Copies: video linking adds keys that must not leak into the cached output
+            all_matches.extend(dict(m) for m in outputs[key]['matches'])
+    if 'all_time' in errors:
+        print(f"Error processing all_time: {errors['all_time']}")
+    season_data['all_time'] = outputs.get('all_time', [])
+    
+    # Drop entries for workbooks that were removed from FILES_CONFIG
+    known_keys = {c['key'] for c in FILES_CONFIG} | {'all_time'}
+    manifest['inputs'] = {k: v for k, v in manifest['inputs'].items() if k in known_keys}
+    try:
+        save_manifest(manifest)
+    except OSError as e:
+        print(f"Could not write build manifest: {e}")
+    return season_data, all_matches
+
+# --- MAIN EXECUTION ---
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Builds the website data (data/shards/) from the season workbooks.",
+        epilog="Examples: `build_script.py` (same as `build all`), `build_script.py build declarations`, "
+               "`build_script.py watch`. A partial build updates its shards in data/shards/ in place "
+               "(plus the search index) and leaves the rest of the published data as it is.")
+    parser.add_argument('command', nargs='?', choices=['build', 'watch'], default='build',
+                        help="build (default) or watch: build everything, then serve it and rebuild on changes (same as --watch).")
+    parser.add_argument('section', nargs='?', choices=SECTIONS + ('all',), default='all',
+                        help="What to build: all (default), or only the stats (season sheets and STATS TOTALI), "
+                             "the matches (with their videos), the gallery or the declarations.")
+    parser.add_argument('--force', action='store_true',
+                        help="Ignore the build manifest and video index: re-parse every workbook and re-sync YouTube.")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Worker processes for parsing workbooks and making thumbnails (default: 1; 0 = one per CPU). "
+                             "The YouTube sync, gallery and declarations run alongside them on threads.")
+    parser.add_argument('--reader', choices=['stream', 'pandas'], default='stream',
+                        help="How season workbooks are read: row-by-row with openpyxl (default) or via pd.read_excel.")
+    parser.add_argument('--legacy-cache', action='store_true',
+                        help="Also write the single data/website_data_cache.json file and the gallery thumbnails the pre-shard frontend loads.")
+    parser.add_argument('--avif', action='store_true',
+                        help="Also encode gallery variants as AVIF (slow; WebP and JPEG are always written).")
+    parser.add_argument('--compact', action='store_true',
+                        help="Columnar, string-interned shards with precompressed .gz/.br copies (decoded by js/decoder.js).")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record wall/CPU time and peak memory per stage and season, plus counters, as JSON.")
+    parser.add_argument('--profile-report', default=PROFILE_REPORT_FILE, metavar='PATH',
+                        help="Where --profile writes its report (default: .build_cache/build_profile.json).")
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help="Also dump cProfile stats of the main process to FILE (view with snakeviz, flameprof or pstats).")
+    parser.add_argument('--watch', action='store_true',
+                        help="After building, serve the site with live reload and rebuild only what changes in data/, images/gallery/ and declarations/.")
+    parser.add_argument('--port', type=int, default=8000,
+                        help="Port of the --watch preview server (default: 8000).")
+    # Options may come before or after `build <section>`
+    args = parser.parse_intermixed_args()
+    if args.command == 'watch':
+        args.watch = True
+    if args.watch and args.section != 'all':
+        parser.error("watch mode needs a full build: use `watch` or `build all --watch`")
+    return args
+
+def selected_sections(args):
+    return SECTIONS if args.section == 'all' else (args.section,)
+
+def store_sections(sections, reset, season_data, matches=None):
+    """The stored sections of the build (see update_store()), from the ingested stats and the linked matches."""
+    final_data = dict(season_data) if 'stats' in sections else {}
+    if matches is not None:
+        final_data['matches'] = matches
+    update_store(final_data, sections, reset=reset)
+    return final_data
+
+def build_site(args, sections=SECTIONS, offline=False):
+    """
+    Runs the stages behind `sections` (every stage by default) as a build
+    graph (see build_graph.py). The workbooks are parsed in worker processes
+    while the YouTube sync, the gallery and the declarations run on threads;
+    the linker starts once both the matches and the videos are in, the store
+    once the linked matches are. offline=True links the videos already in
+    the local index instead of syncing.
+    Returns final_data with just those sections; a stats build returns the
+    re-linked matches as well (see update_store()).
+    """
+    jobs = args.jobs or os.cpu_count() or 1
+    graph = build_graph.BuildGraph()
+    stored = [section for section in ('stats', 'matches') if section in sections]
+    
+    if stored:
+        manifest = load_manifest(force=args.force)
+        tasks, cached = plan_ingest(manifest, reader=args.reader, all_time='stats' in sections)
+        if jobs > 1 and len(tasks) > 1:
+            print(f"Parsing {len(tasks)} workbooks with {min(jobs, len(tasks))} workers...")
+        for key, _, _, func, func_args in tasks:
+            graph.add(f'ingest/{key}', parse_workbook, outputs=[f'parsed/{key}'], args=(func, *func_args),
+                      kind='process')
+        graph.add('ingest', finish_ingest, inputs=[f'parsed/{task[0]}' for task in tasks],
+                  outputs=['season_data', 'all_matches'], args=(manifest, tasks, cached))
     
     # --- YouTube API Integration (Build-Time Fetch) ---
-    youtube_api_key = os.environ.get('YOUTUBE_API_KEY')
-    youtube_channel_id = os.environ.get('TORNEICONTI_CHANNEL_ID')
+    if 'matches' in sections:
+        graph.add('youtube/sync', sync_youtube, outputs=['videos'], args=(args.force, offline))
+        graph.add('youtube/link', link_youtube, inputs=['all_matches', 'videos'], outputs=['matches'])
     
-    if youtube_api_key and youtube_channel_id:
-        print("API keys found. Fetching YouTube video list...")
-        all_matches = fetch_youtube_videos_and_link(all_matches, youtube_api_key, youtube_channel_id)
-    else:
-        print("WARNING: YOUTUBE_API_KEY or CHANNEL_ID not found in environment variables. Skipping video fetch.")
-        
-    # Finalize Matches (Sorts and saves all_matches, now with video IDs)
-    all_matches.sort(key=lambda x: x['date'], reverse=True)
-    final_data['matches'] = all_matches
+    if stored:
+        graph.add('store', store_sections, inputs=['season_data'] + (['matches'] if 'matches' in sections else []),
+                  outputs=['stored'], args=(sections, set(sections) == set(SECTIONS)))
+    
+    if 'stats' in sections:
+        graph.add('totals_check', check_all_time_totals, inputs=['stored'])
 
-    final_data['gallery'] = scan_gallery_images()
+    if 'gallery' in sections:
+        # Thumbnails go to the worker processes too, unless there is just one (then the thread makes them)
+        graph.add('gallery', scan_gallery_images, inputs=[build_graph.POOL] if jobs > 1 else [],
+                  outputs=['gallery'], args=(jobs, args.avif, args.legacy_cache))
 
-    final_data['declarations'] = scan_declarations()
+    if 'declarations' in sections:
+        graph.add('declarations', scan_declarations, outputs=['declarations'])
     
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(final_data, f, indent=4)
-        
-    print("Done! Data conversion complete.")
\ No newline at end of file
+    values = graph.run(jobs=jobs)
+    final_data = dict(values.get('stored', {}))
+    for name in ('gallery', 'declarations'):
+        if name in values:
+            final_data[name] = values[name]
+    return final_data
+
+def ordered_data(data):
+    """`data` with its sections in output order: the seasons newest first, then the rest."""
+    order = [c['key'] for c in FILES_CONFIG] + ['all_time', 'matches', 'gallery', 'declarations']
+    return {key: data[key] for key in order if key in data}
+
+def write_output(final_data, args, sections=SECTIONS):
+    """
+    Writes the shards of `sections`. For a partial build the other sections
+    the search index (or --legacy-cache) needs are read back from the
+    published shards, and the shard manifest is updated in place.
+    """
+    # A stats build re-links the match events to the players: their shards change too
+    if 'matches' in final_data and 'matches' not in sections:
+        sections = [section for section in SECTIONS if section in sections or section == 'matches']
+    partial = set(sections) != set(SECTIONS)
+    if partial:
+        needed = set(SECTIONS) if args.legacy_cache else set(SEARCH_SECTIONS) if set(sections) & set(SEARCH_SECTIONS) else set()
+        needed -= set(sections)
+        if needed:
+            with build_profile.stage('load_published'):
+                published = load_published_data(needed)
+            if published is None:
+                raise ValueError(f"no published shards in {SHARDS_DIR}; run 'build all' first")
+            final_data = ordered_data(dict(published, **final_data))
+    
+    with build_profile.stage('build_shards'):
+        shards = build_shards(final_data, sections)
+    with build_profile.stage('write_shards'):
+        if partial:
+            owned = [prefix for section in sections for prefix in SECTION_SHARDS[section]]
+            if set(sections) & set(SEARCH_SECTIONS):
+                owned.extend(SEARCH_SHARDS)
+            write_shards(shards, compact=args.compact, replace=owned)
+        else:
+            write_shards(shards, compact=args.compact)
+    
+    if args.legacy_cache:
+        # The pre-shard gallery.js expects the gallery as a list of filenames
+        legacy = dict(final_data, gallery=sorted(entry['file'] for entry in final_data.get('gallery', [])))
+        write_atomic(OUTPUT_FILE, json.dumps(legacy, indent=4).encode('utf-8'))
+
+# --- WATCH MODE ---
+def ignored_by_watch(path):
+    name = os.path.basename(path)
+    # Office lock files (~$...), hidden/temp files and the build's own output
+    return name.startswith(('~$', '.')) or name.endswith('.tmp') or os.path.normpath(path) == os.path.normpath(OUTPUT_FILE)
+
+def changed_sections(paths):
+    """
+    Maps changed files to what must be rebuilt: season keys, 'all_time',
+    'players' (the alias file), 'gallery', 'declarations'.
+    """
+    by_filename = {c['filename']: c['key'] for c in FILES_CONFIG}
+    by_filename[ALL_TIME_FILENAME] = 'all_time'
+    sections = set()
+    for path in paths:
+        folder, name = os.path.split(os.path.normpath(path))
+        if folder == os.path.normpath(DATA_DIR) and name in by_filename:
+            sections.add(by_filename[name])
+        elif os.path.normpath(path) == os.path.normpath(ALIASES_FILE):
+            sections.add('players')
+        elif folder == os.path.normpath(GALLERY_DIR):
+            sections.add('gallery')
+        elif folder == os.path.normpath(DECLARATIONS_DIR) and name.endswith('.txt'):
+            sections.add('declarations')
+    return sections
+
+def rebuild_sections(final_data, changed, args):
+    """
+    Runs the part of the build graph the changed inputs feed (see
+    changed_sections()) and updates final_data in place. Unchanged workbooks
+    come from the build manifest and the videos from the local index: no
+    API calls while watching.
+    """
+    season_keys = {c['key'] for c in FILES_CONFIG}
+    sections = set(changed) & {'gallery', 'declarations'}
+    if changed & season_keys:
+        sections |= {'stats', 'matches'}
+    if changed & {'all_time', 'players'}:
+        # The store re-links the match events to the players (see update_store())
+        sections.add('stats')
+    rebuilt = build_site(argparse.Namespace(**dict(vars(args), force=False)),
+                         [section for section in SECTIONS if section in sections], offline=True)
+    if 'stats' in sections:
+        # A season whose workbook was removed (or can't be read) drops out
+        for key in season_keys:
+            final_data.pop(key, None)
+    merged = ordered_data(dict(final_data, **rebuilt))
+    final_data.clear()
+    final_data.update(merged)
+
+def watch(final_data, args):
+    """Serves the site with live reload and rebuilds the affected sections whenever an input changes."""
+    import dev_server
+    server = dev_server.PreviewServer(BASE_DIR, port=args.port).start()
+    watcher = dev_server.PollingWatcher([DATA_DIR, GALLERY_DIR, DECLARATIONS_DIR], ignore=ignored_by_watch)
+    print(f"Watching data/, images/gallery/ and declarations/. Preview: {server.url} (Ctrl+C to stop)")
+    
+    try:
+        for paths in watcher.changes():
+            sections = changed_sections(paths)
+            if not sections:
+                continue
+            start = time.perf_counter()
+            print(f"\nChanged: {', '.join(sorted(os.path.basename(p) for p in paths))}")
+            try:
+                rebuild_sections(final_data, sections, args)
+                write_output(final_data, args)
+            except Exception as e:
+                print(f"Rebuild failed: {e}")
+                continue
+            server.reload()
+            print(f"Rebuilt {', '.join(sorted(sections))} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("\nStopping watch mode.")
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.profile:
+        build_profile.enable()
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    sections = selected_sections(args)
+    print("Starting conversion..." if args.section == 'all' else f"Building {args.section}...")
+    try:
+        final_data = build_site(args, sections)
+        write_output(final_data, args, sections)
+    except ValueError as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+    print("Done! Data conversion complete.")
+    
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        print(f"cProfile stats written to {args.cprofile}")
+    if args.profile:
+        build_profile.print_summary(build_profile.PROFILE.write_report(args.profile_report))
+        print(f"Profile report written to {args.profile_report}")
+    
+    if args.watch:
+        watch(final_data, args)
@@ -0,0 +1,186 @@
+"""
+Compact (columnar, string-interned) encoding for the website data shards.
+
+A list of records such as
+
+    [{"name": "Davide Scocco", "apps": 4, ...}, {"name": "Andrea Perugini", "apps": 3, ...}]
+
+becomes a struct-of-arrays table
+
+    {"$table": 2, "columns": ["name", "apps", ...],
+     "data": {"name": {"ids": [0, 7]}, "apps": {"values": [4, 3]}, ...}}
+
+Player/opponent names (and the scorer/card lists of each match) are stored as
+integer ids into one string table shared by every shard, written as the
+"strings" shard. Columns that hold the same value in every row are stored once
+as {"const": value}; keys missing from some records are listed in "absent".
+A column of lists of records (the events of each match) is itself encoded as
+one table of all their items, with each row's item count:
+
+    "events": {"rows": [3, 0, 2], "table": {"$table": 5, "columns": ["type", "player", ...], ...}}
+
+js/decoder.js turns a table back into the original list of records.
+"""
+import gzip
+import itertools
+from collections import Counter
+
+try:
+    import brotli
+except ImportError:  # optional: only needed for the .br siblings
+    brotli = None
+
+# Columns whose values (or list items) go through the shared string table
+INTERNED_COLUMNS = {
+    'name', 'opponent', 'season', 'home_status', 'result',
+    'scorers', 'yellow_cards_recipients', 'red_cards_recipients', 'saved_penalty_goalkeepers',
+    'type', 'player', 'player_id'
+}
+
+
+def is_table(payload):
+    return isinstance(payload, list) and len(payload) > 0 and all(isinstance(r, dict) for r in payload)
+
+
+def _columns(records):
+    columns = []
+    for record in records:
+        for col in record:
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+
+def _is_const(records, col):
+    first = records[0].get(col)
+    return all(col in record and record[col] == first for record in records)
+
+
+def _is_nested(records, col):
+    """True if the column holds lists of records (and at least one record)."""
+    lists = [record[col] for record in records if col in record]
+    return (all(isinstance(value, list) for value in lists) and any(lists)
+            and all(isinstance(item, dict) for value in lists for item in value))
+
+
+def _nested_items(records, col):
+    return [item for record in records for item in record.get(col) or []]
+
+
+def _interned_values(records):
+    for col in _columns(records):
+        if _is_const(records, col):
+            continue
+        if _is_nested(records, col):
+            yield from _interned_values(_nested_items(records, col))
+            continue
+        if col not in INTERNED_COLUMNS:
+            continue
+        for record in records:
+            value = record.get(col)
+            if isinstance(value, str):
+                yield value
+            elif isinstance(value, list):
+                yield from (v for v in value if isinstance(v, str))
+
+
+def build_string_table(shards, strings=None):
+    """
+    Most frequent strings first, so the common names get the shortest ids.
+    New strings are appended to `strings` (an existing table, whose ids the
+    shards that are not re-encoded still use) when given.
+    """
+    counts = Counter()
+    for payload in shards.values():
+        if is_table(payload):
+            counts.update(_interned_values(payload))
+    known = set(strings or [])
+    return list(strings or []) + sorted((s for s in counts if s not in known), key=lambda s: (-counts[s], s))
+
+
+def encode_table(records, string_ids):
+    columns = _columns(records)
+    data = {}
+    for col in columns:
+        if _is_const(records, col):
+            data[col] = {"const": records[0][col]}
+            continue
+
+        absent = [i for i, record in enumerate(records) if col not in record]
+        values = [record.get(col) for record in records]
+        if _is_nested(records, col):
+            spec = {"rows": [len(value or []) for value in values],
+                    "table": encode_table(_nested_items(records, col), string_ids)}
+        elif col in INTERNED_COLUMNS:
+            spec = {"ids": [_intern(v, string_ids) for v in values]}
+        else:
+            spec = {"values": values}
+
+        if absent:
+            spec["absent"] = absent
+        data[col] = spec
+
+    return {"$table": len(records), "columns": columns, "data": data}
+
+
+def _intern(value, string_ids):
+    if isinstance(value, str):
+        return string_ids[value]
+    if isinstance(value, list):
+        return [string_ids[v] if isinstance(v, str) else v for v in value]
+    return value
+
+
+def decode_table(payload, strings):
+    """Python twin of js/decoder.js: a table back into its list of records (other payloads unchanged)."""
+    if not isinstance(payload, dict) or '$table' not in payload:
+        return payload
+
+    def lookup(value):
+        return strings[value] if isinstance(value, int) and not isinstance(value, bool) else value
+
+    records = [{} for _ in range(payload['$table'])]
+    for col in payload['columns']:
+        spec = payload['data'][col]
+        absent = set(spec.get('absent', []))
+        if 'rows' in spec:
+            items = decode_table(spec['table'], strings)
+            starts = [0, *itertools.accumulate(spec['rows'])]
+        for i, record in enumerate(records):
+            if i in absent:
+                continue
+            if 'const' in spec:
+                value = list(spec['const']) if isinstance(spec['const'], list) else spec['const']
+            elif 'ids' in spec:
+                value = spec['ids'][i]
+                value = [lookup(v) for v in value] if isinstance(value, list) else lookup(value)
+            elif 'rows' in spec:
+                value = items[starts[i]:starts[i] + spec['rows'][i]]
+            else:
+                value = spec['values'][i]
+            record[col] = value
+    return records
+
+
+def encode_shards(shards, strings=None):
+    """
+    Returns a new {name: payload} dict with every list-of-records shard
+    encoded as a table, plus the shared "strings" shard they reference.
+    Pass the published "strings" shard as `strings` when only some shards
+    are being re-encoded, so the ids in the others stay valid.
+    """
+    strings = build_string_table(shards, strings)
+    string_ids = {s: i for i, s in enumerate(strings)}
+
+    encoded = {name: encode_table(payload, string_ids) if is_table(payload) else payload
+               for name, payload in shards.items()}
+    encoded['strings'] = strings
+    return encoded
+
+
+def precompressed_siblings(body):
+    """Returns {extension: compressed bytes} for the .gz (and, if available, .br) copies of a file."""
+    siblings = {'.gz': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        siblings['.br'] = brotli.compress(body, quality=11)
+    return siblings
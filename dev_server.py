@@ -0,0 +1,152 @@
+"""
+Local preview for watch mode: a file watcher and a static server with live reload.
+
+The watcher polls file sizes and mtimes (a few dozen files, so a scan costs
+well under a millisecond and needs no platform-specific inotify/FSEvents
+dependency) and reports a batch of changed paths once they stop changing,
+so a workbook that Excel writes in several steps is rebuilt once.
+
+The server serves the site folder and injects a small script into every HTML
+page that listens on /__livereload (Server-Sent Events); reload() makes every
+open page refresh itself.
+"""
+import http.server
+import os
+import threading
+import time
+from functools import partial
+
+LIVE_RELOAD_PATH = '/__livereload'
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource('" + LIVE_RELOAD_PATH + "')"
+    ".onmessage = () => location.reload();</script>"
+)
+KEEPALIVE_SECONDS = 15
+
+
+class PollingWatcher:
+    """Watches the files directly inside `roots` (not sub-folders)."""
+
+    def __init__(self, roots, ignore=None, interval=0.1):
+        self.roots = roots
+        self.ignore = ignore or (lambda path: False)
+        self.interval = interval
+        self.state = self.snapshot()
+
+    def snapshot(self):
+        state = {}
+        for root in self.roots:
+            try:
+                entries = list(os.scandir(root))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_file() and not self.ignore(entry.path):
+                    stat = entry.stat()
+                    state[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def _diff(self, new):
+        return {path for path in set(self.state) | set(new) if self.state.get(path) != new.get(path)}
+
+    def changes(self):
+        """Yields sets of changed (added, modified or removed) paths, forever."""
+        while True:
+            time.sleep(self.interval)
+            new = self.snapshot()
+            changed = self._diff(new)
+            if not changed:
+                continue
+            # Wait until the files settle, then report everything that moved meanwhile
+            while True:
+                time.sleep(self.interval)
+                settled = self.snapshot()
+                if settled == new:
+                    break
+                new = settled
+            changed = self._diff(new)
+            self.state = new
+            if changed:
+                yield changed
+
+
+class LiveReloadHandler(http.server.SimpleHTTPRequestHandler):
+    def __init__(self, *args, server_state=None, **kwargs):
+        self.server_state = server_state
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass  # the build output is noisy enough
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == LIVE_RELOAD_PATH:
+            return self.stream_reloads()
+        if path == '/':
+            path = '/index.html'
+        if path.endswith('.html'):
+            return self.send_html(path)
+        return super().do_GET()
+
+    def send_html(self, path):
+        file_path = self.translate_path(path)
+        try:
+            with open(file_path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            return self.send_error(404, "File not found")
+        body = body.replace(b'</body>', LIVE_RELOAD_SCRIPT.encode('utf-8') + b'</body>', 1)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        state = self.server_state
+        with state['changed']:
+            seen = state['version']
+        try:
+            while True:
+                with state['changed']:
+                    state['changed'].wait_for(lambda: state['version'] != seen, timeout=KEEPALIVE_SECONDS)
+                    version = state['version']
+                if version != seen:
+                    seen = version
+                    self.wfile.write(f"data: {version}\n\n".encode('ascii'))
+                else:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class PreviewServer:
+    """Serves `root` on `port` from a background thread."""
+
+    def __init__(self, root, port=8000, host='127.0.0.1'):
+        self.state = {'version': 0, 'changed': threading.Condition()}
+        handler = partial(LiveReloadHandler, directory=root, server_state=self.state)
+        self.httpd = http.server.ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def reload(self):
+        """Tells every open page to reload."""
+        with self.state['changed']:
+            self.state['version'] += 1
+            self.state['changed'].notify_all()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,26 @@
+"""
+File helpers shared by the build: everything it writes (shards, caches,
+indexes, reports, gallery variants) goes through write_atomic(), and the
+inputs it caches work for (workbooks, gallery originals) are keyed by
+file_hash().
+"""
+import hashlib
+import os
+
+
+def file_hash(path):
+    """Returns the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_atomic(path, body):
+    """Writes bytes to `path` via a temp file + rename, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
@@ -0,0 +1,43 @@
+// --- SHARDED DATA LOADER ---
+// The build writes one JSON file per section/season into data/shards/ and a
+// manifest.json mapping each shard name (e.g. "stats/season_25_26") to its
+// content-hashed file. Shard files never change, so the browser can cache
+// them forever; only the (small) manifest is revalidated on every visit.
+// Builds made with --compact store tables in columnar form; those are decoded
+// with decodeShard() from js/decoder.js.
+
+const DATA_ROOT = 'data/shards/';
+
+let manifestPromise = null;
+const shardCache = {};
+
+function loadManifest() {
+    if (!manifestPromise) {
+        manifestPromise = fetch(DATA_ROOT + 'manifest.json', { cache: 'no-cache' })
+            .then(response => response.json());
+    }
+    return manifestPromise;
+}
+
+// Resolves to the shard's data, or null if the build didn't produce it
+function loadShard(name) {
+    if (!shardCache[name]) {
+        shardCache[name] = loadManifest().then(manifest => {
+            const entry = manifest.shards[name];
+            if (!entry) return null;
+            const payload = fetch(DATA_ROOT + entry.file).then(response => response.json());
+            if (manifest.encoding !== 'columnar' || name === 'strings') return payload;
+
+            return Promise.all([payload, loadShard('strings')])
+                .then(([data, strings]) => decodeShard(data, strings));
+        });
+    }
+    return shardCache[name];
+}
+
+// Loads the same section for every season, newest season first
+function loadSeasonShards(section) {
+    return loadManifest().then(manifest =>
+        Promise.all(manifest.seasons.map(season => loadShard(`${section}/${season}`)))
+    );
+}
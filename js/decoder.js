@@ -0,0 +1,45 @@
+// --- COMPACT SHARD DECODER ---
+// Turns a columnar table written by compact_encoding.py back into the list
+// of records the pages expect. `strings` is the shared "strings" shard that
+// interned columns ({ids: [...]}) point into. A column of lists of records
+// ({rows: [...], table: {...}}) is one nested table sliced back per row.
+
+function decodeShard(payload, strings) {
+    if (!payload || payload.$table === undefined) return payload;
+
+    const count = payload.$table;
+    const records = [];
+    for (let i = 0; i < count; i++) records.push({});
+
+    const lookup = v => (typeof v === 'number' ? strings[v] : v);
+
+    payload.columns.forEach(col => {
+        const spec = payload.data[col];
+        const absent = new Set(spec.absent || []);
+        const items = 'rows' in spec ? decodeShard(spec.table, strings) : null;
+        let start = 0;
+
+        for (let i = 0; i < count; i++) {
+            if (items) {
+                const rows = spec.rows[i];
+                if (!absent.has(i)) records[i][col] = items.slice(start, start + rows);
+                start += rows;
+                continue;
+            }
+            if (absent.has(i)) continue;
+
+            let value;
+            if ('const' in spec) {
+                value = Array.isArray(spec.const) ? spec.const.slice() : spec.const;
+            } else if ('ids' in spec) {
+                const id = spec.ids[i];
+                value = Array.isArray(id) ? id.map(lookup) : lookup(id);
+            } else {
+                value = spec.values[i];
+            }
+            records[i][col] = value;
+        }
+    });
+
+    return records;
+}
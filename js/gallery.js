@@ -1,31 +1,31 @@
-let allImages = []; // Stores the list of image paths
+let allImages = []; // Stores the gallery entries (size, placeholder, srcset per format)
 let currentIndex = 0; // Tracks the open image
 
 document.addEventListener('DOMContentLoaded', function() {
-    fetch('data/website_data_cache.json')
-        .then(response => response.json())
-        .then(data => {
+    loadShard('gallery')
+        .then(gallery => {
             const container = document.getElementById('gallery-grid');
             
-            if (data.gallery && data.gallery.length > 0) {
+            if (gallery && gallery.length > 0) {
                 container.innerHTML = ''; 
                 
-                // 1. Save all paths to the global array
-                allImages = data.gallery.map(filename => `images/gallery/${filename}`);
+                // 1. Save all entries to the global array
+                allImages = gallery;
                 
                 // 2. Build the grid
-                allImages.forEach((fullPath, index) => {
-                    // Construct the path to the thumbnail
-                    // Logic: "images/gallery/photo.jpg" -> "images/gallery/thumbnails/photo.jpg"
-                    const parts = fullPath.split('/');
-                    const filename = parts.pop();
-                    const thumbPath = parts.join('/') + '/thumbnails/' + filename;
-
+                allImages.forEach((image, index) => {
                     const div = document.createElement('div');
                     div.className = 'gallery-item';
-                    // SRC = Thumbnail, CLICK = Full Index (which loads fullPath)
+                    // The browser picks the smallest variant that fills the cell;
+                    // the blurred placeholder shows until it arrives
                     div.innerHTML = `
-                        <img src="${thumbPath}" alt="Team Photo" loading="lazy" onclick="openLightbox(${index})">
+                        <picture>
+                            ${pictureSources(image, GRID_SIZES)}
+                            <img src="${image.src}" srcset="${image.srcset.jpeg}" sizes="${GRID_SIZES}"
+                                 width="${image.width}" height="${image.height}"
+                                 style="background: url('${image.placeholder}') center / cover;"
+                                 alt="Team Photo" loading="lazy" onclick="openLightbox(${index})">
+                        </picture>
                     `;
                     container.appendChild(div);
                 });
@@ -36,6 +36,18 @@ document.addEventListener('DOMContentLoaded', function() {
         .catch(err => console.error(err));
 });
 
+// Grid cells are 200px+ wide (two per row on phones)
+const GRID_SIZES = '(max-width: 600px) 50vw, 300px';
+const LIGHTBOX_SIZES = '85vw';
+
+// <source> tags for the modern formats; the <img> itself carries the JPEG fallback
+function pictureSources(image, sizes) {
+    return ['avif', 'webp']
+        .filter(format => image.srcset[format])
+        .map(format => `<source type="image/${format}" srcset="${image.srcset[format]}" sizes="${sizes}">`)
+        .join('');
+}
+
 // --- LIGHTBOX LOGIC ---
 
 function openLightbox(index) {
@@ -67,8 +79,14 @@ function changeSlide(n) {
 }
 
 function updateLightboxImage() {
-    const img = document.getElementById('lightbox-img');
-    img.src = allImages[currentIndex];
+    const image = allImages[currentIndex];
+
+    // <source> tags must be direct children of <picture>, so rebuild it
+    document.getElementById('lightbox-picture').innerHTML = `
+        ${pictureSources(image, LIGHTBOX_SIZES)}
+        <img class="lightbox-content" id="lightbox-img" onclick="event.stopPropagation()"
+             src="${image.src}" srcset="${image.srcset.jpeg}" sizes="${LIGHTBOX_SIZES}"
+             width="${image.width}" height="${image.height}" alt="Team Photo">`;
 }
 
 // Optional: Add Keyboard Navigation (Left/Right Arrow)
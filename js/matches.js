@@ -1,9 +1,10 @@
 document.addEventListener('DOMContentLoaded', function() {
-    fetch('data/website_data_cache.json')
-        .then(response => response.json())
-        .then(data => {
-            if(data.matches) {
-                renderMatches(data.matches);
+    loadSeasonShards('matches')
+        .then(seasons => {
+            const matches = [].concat(...seasons.filter(Boolean));
+            if (matches.length > 0) {
+                matches.sort((a, b) => b.date.localeCompare(a.date));
+                renderMatches(matches);
             } else {
                 document.getElementById('match-list').innerHTML = "<p>L'archivio è vuoto.</p>";
             }
@@ -79,6 +80,15 @@ function renderMatches(matches) {
             matchTitle = `${match.opponent} vs <br> Tamarindi F.C.`;
         }
 
+        // --- 5. Other Videos (e.g. full match next to the highlights) ---
+        let otherVideosHtml = '';
+        if (match.videos && match.videos.length > 1) {
+            const links = match.videos
+                .filter(v => v.videoId !== match.videoId)
+                .map(v => `<a href="https://www.youtube.com/watch?v=${v.videoId}" target="_blank">${v.kind === 'full' ? 'Partita Completa' : 'Video'}</a>`);
+            otherVideosHtml = `<div style="font-size:0.85rem; margin-top:5px;">Altri video: ${links.join(', ')}</div>`;
+        }
+
         const card = document.createElement('div');
         card.className = `match-card ${resultClass}`;
         card.innerHTML = `
@@ -110,6 +120,7 @@ function renderMatches(matches) {
                 : `<div class="yt-button" style="background:#444; cursor:default; border-color:#222;">Video Not Available</div>`
             }
             <div class="video-container"></div>
+            ${otherVideosHtml}
         `;
         container.appendChild(card);
     });
@@ -30,11 +30,12 @@ document.addEventListener('DOMContentLoaded', function() {
         console.error("Error: Could not find button or sidebar elements.");
     }
 
-    fetch('data/website_data_cache.json')
-    .then(response => response.json())
-    .then(data => {
-        if (data.declarations && data.declarations.length > 0) {
-            const latest = data.declarations[0]; // First one is the newest
+    setupSearchBox('site-search', 'site-search-results');
+
+    loadShard('declarations')
+    .then(declarations => {
+        if (declarations && declarations.length > 0) {
+            const latest = declarations[0]; // First one is the newest
             
             const container = document.getElementById('latest-news-container');
             if (container) {
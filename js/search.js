@@ -0,0 +1,102 @@
+// --- SITE SEARCH ---
+// Queries the prebuilt index written by search_index.py: "search/docs" holds
+// the documents, "search/terms/<xx>" the postings of every token starting
+// with "xx". A query only loads the term shards its words start with, and
+// every word matches as a prefix, so results show up while typing.
+
+const SEARCH_PREFIX_LENGTH = 2;
+
+const SEARCH_LINKS = {
+    player: 'stats.html',
+    season: 'stats.html',
+    match: 'matches.html',
+    declaration: 'declarations.html'
+};
+
+// Same folding as text_utils.fold(); dd/mm/yyyy dates become yyyy-mm-dd
+function searchTokens(query) {
+    const folded = query.normalize('NFKD').replace(/[\u0300-\u036f]/g, '').toLowerCase()
+        .replace(/\b(\d{1,2})\/(\d{1,2})\/(\d{4})\b/g,
+            (_, d, m, y) => `${y}-${m.padStart(2, '0')}-${d.padStart(2, '0')}`);
+    return folded.match(/\d{4}-\d{2}(-\d{2})?|[a-z0-9]+/g) || [];
+}
+
+// Postings of every indexed token starting with `word`, as {docId: weight}
+function prefixPostings(word) {
+    return loadManifest().then(manifest => {
+        const names = word.length >= SEARCH_PREFIX_LENGTH
+            ? [`search/terms/${word.slice(0, SEARCH_PREFIX_LENGTH)}`]
+            : Object.keys(manifest.shards).filter(name => name.startsWith(`search/terms/${word}`));
+        return Promise.all(names.map(name => loadShard(name)));
+    }).then(shards => {
+        const hits = {};
+        shards.forEach(terms => {
+            if (!terms) return;
+            Object.keys(terms).forEach(token => {
+                if (!token.startsWith(word)) return;
+                // A whole-word hit ranks above a prefix hit
+                const boost = token === word ? 2 : 1;
+                terms[token].forEach(([docId, weight]) => {
+                    hits[docId] = Math.max(hits[docId] || 0, weight * boost);
+                });
+            });
+        });
+        return hits;
+    });
+}
+
+// Resolves to up to `limit` documents matching every word of the query, best first
+function searchSite(query, limit = 20) {
+    return Promise.all([loadShard('search/docs'), loadShard('search/stopwords')])
+        .then(([docs, stopwords]) => {
+            // Words the index leaves out can only match as the (still being typed) last word
+            const all = searchTokens(query);
+            const words = all.filter((word, i) =>
+                i === all.length - 1 || (word.length >= SEARCH_PREFIX_LENGTH && !(stopwords || []).includes(word)));
+            if (!docs || words.length === 0) return [];
+            return Promise.all(words.map(prefixPostings)).then(postings => rank(docs, postings, limit));
+        });
+}
+
+// Keeps the documents every word hit, scored by the sum of their weights
+function rank(docs, postings, limit) {
+    let scores = postings[0];
+    postings.slice(1).forEach(hits => {
+        const both = {};
+        Object.keys(scores).forEach(docId => {
+            if (docId in hits) both[docId] = scores[docId] + hits[docId];
+        });
+        scores = both;
+    });
+
+    // Ties keep index order: seasons, players, then newest matches and declarations
+    return Object.keys(scores)
+        .map(Number)
+        .sort((a, b) => scores[b] - scores[a] || a - b)
+        .slice(0, limit)
+        .map(docId => Object.assign({ link: SEARCH_LINKS[docs[docId].type] }, docs[docId]));
+}
+
+// Wires a text input to a result list (type-ahead)
+function setupSearchBox(inputId, resultsId) {
+    const input = document.getElementById(inputId);
+    const results = document.getElementById(resultsId);
+    if (!input || !results) return;
+
+    let latest = 0;
+    input.addEventListener('input', () => {
+        const request = ++latest;
+        searchSite(input.value, 10).then(docs => {
+            if (request !== latest) return; // a newer keystroke already answered
+            results.innerHTML = '';
+            docs.forEach(doc => {
+                const item = document.createElement('li');
+                const link = document.createElement('a');
+                link.href = doc.link;
+                link.textContent = doc.label;
+                item.appendChild(link);
+                results.appendChild(item);
+            });
+        }).catch(err => console.error('Search failed:', err));
+    });
+}
@@ -1,4 +1,5 @@
 let globalData = {};
+let globalOrders = {};
 
 // State to track sorting
 let currentSort = {
@@ -6,28 +7,42 @@ let currentSort = {
     direction: 'desc' 
 };
 
+// Views that aren't a single season: where their data lives and their default sort
+const VIEWS = {
+    all_time: { shard: 'stats/all_time', sort: 'total_apps' },
+    careers: { shard: 'aggregates/careers', sort: 'goals' },
+    head_to_head: { shard: 'aggregates/head_to_head', sort: 'played' }
+};
+
 document.addEventListener('DOMContentLoaded', function() {
     console.log("Stats page loaded");
     
-    fetch('data/website_data_cache.json')
-        .then(response => response.json())
-        .then(data => {
-            globalData = data;
-            renderTable('season_25_26'); 
-        })
-        .catch(err => console.error("Error loading stats:", err));
+    showTable('season_25_26');
 });
 
 function changeSeason() {
     const selected = document.getElementById('season-select').value;
     
-    if (selected === 'all_time') {
-        currentSort = { column: 'total_apps', direction: 'desc' };
-    } else {
-        currentSort = { column: 'goals', direction: 'desc' };
-    }
+    currentSort = { column: VIEWS[selected] ? VIEWS[selected].sort : 'goals', direction: 'desc' };
     
-    renderTable(selected);
+    showTable(selected);
+}
+
+// Loads the view's shard (and its precomputed sort orders) the first time it's selected, then renders it
+function showTable(key) {
+    if (globalData[key]) {
+        renderTable(key);
+        return;
+    }
+    const shard = VIEWS[key] ? VIEWS[key].shard : `stats/${key}`;
+    Promise.all([loadShard(shard), loadShard(`orders/${shard}`)])
+        .then(([players, orders]) => {
+            if (!players) return;
+            globalData[key] = players;
+            globalOrders[key] = orders || {};
+            renderTable(key);
+        })
+        .catch(err => console.error("Error loading stats:", err));
 }
 
 function handleSort(column) {
@@ -37,7 +52,7 @@ function handleSort(column) {
         currentSort.column = column;
         // Names and Numbers usually sort Low-to-High (A-Z, 1-99)
         // Stats usually sort High-to-Low (Most goals first)
-        currentSort.direction = (column === 'name' || column === 'number' || column === 'role') ? 'asc' : 'desc';
+        currentSort.direction = ['name', 'number', 'role', 'opponent'].includes(column) ? 'asc' : 'desc';
     }
     
     const currentView = document.getElementById('season-select').value;
@@ -51,30 +66,9 @@ function renderTable(key) {
     
     if (!globalData[key]) return;
 
-    const players = [...globalData[key]]; 
-
-    // 1. SORTING LOGIC
-    players.sort((a, b) => {
-        let valA = a[currentSort.column];
-        let valB = b[currentSort.column];
-
-        const clean = (v, colName) => {
-            if (v === '-' || v === null || v === undefined) return -999;
-            if (colName === 'number') return parseInt(v, 10) || 0;
-            if (typeof v === 'string') {
-                 if (!isNaN(v) && v.trim() !== '') return parseFloat(v);
-                 return v.toLowerCase();
-            }
-            return v;
-        };
-
-        valA = clean(valA, currentSort.column);
-        valB = clean(valB, currentSort.column);
-
-        if (valA < valB) return currentSort.direction === 'asc' ? -1 : 1;
-        if (valA > valB) return currentSort.direction === 'asc' ? 1 : -1;
-        return 0;
-    });
+    // 1. ORDER: the build stores every column's order for both directions (see aggregates.py)
+    const order = (globalOrders[key][currentSort.column] || {})[currentSort.direction];
+    const players = order ? order.map(i => globalData[key][i]) : globalData[key];
 
     // --- HELPER: Merges base styles with the "Active Pink" style ---
     const getStyle = (colName, baseCss = '') => {
@@ -84,7 +78,7 @@ function renderTable(key) {
             css += ' background:#fff0f5;';
             
             // If it's a stats column (not name/role/number), make it bold too
-            if (!['name', 'role', 'number'].includes(colName)) {
+            if (!['name', 'role', 'number', 'opponent'].includes(colName)) {
                 css += ' font-weight:bold;';
             }
         }
@@ -125,6 +119,67 @@ function renderTable(key) {
                 </tr>`;
         });
 
+    } else if (key === 'careers') {
+        title.textContent = "Carriere (somma delle stagioni)";
+        thead.innerHTML = `
+            <tr>
+                ${createHeader('Giocatore', 'name')}
+                ${createHeader('Stagioni', 'seasons')}
+                ${createHeader('Presenze', 'apps')}
+                ${createHeader('Goal', 'goals')}
+                ${createHeader('Assist', 'assists')}
+                ${createHeader('Gialli', 'yellow_cards')}
+                ${createHeader('Rossi', 'red_cards')}
+                ${createHeader('Goal/Partita', 'goals_per_app')}
+            </tr>`;
+
+        tbody.innerHTML = '';
+        players.forEach(p => {
+            tbody.innerHTML += `
+                <tr>
+                    <td ${getStyle('name', 'text-align:left; font-weight:bold;')}>${p.name}</td>
+                    <td ${getStyle('seasons')}>${p.seasons}</td>
+                    
+                    <td ${getStyle('apps')}>${p.apps}</td>
+                    <td ${getStyle('goals')}>${p.goals}</td>
+                    <td ${getStyle('assists')}>${p.assists}</td>
+                    <td ${getStyle('yellow_cards')}>${p.yellow_cards}</td>
+                    <td ${getStyle('red_cards')}>${p.red_cards}</td>
+                    <td ${getStyle('goals_per_app')}>${p.goals_per_app}</td>
+                </tr>`;
+        });
+
+    } else if (key === 'head_to_head') {
+        title.textContent = "Testa a testa (per avversario)";
+        thead.innerHTML = `
+            <tr>
+                ${createHeader('Avversario', 'opponent')}
+                ${createHeader('G', 'played')}
+                ${createHeader('V', 'won')}
+                ${createHeader('N', 'drawn')}
+                ${createHeader('P', 'lost')}
+                ${createHeader('GF', 'goals_for')}
+                ${createHeader('GS', 'goals_against')}
+                ${createHeader('DR', 'goal_difference')}
+                ${createHeader('Rigori V-P', 'shootouts_won')}
+            </tr>`;
+
+        tbody.innerHTML = '';
+        players.forEach(o => {
+            tbody.innerHTML += `
+                <tr>
+                    <td ${getStyle('opponent', 'text-align:left; font-weight:bold;')}>${o.opponent}</td>
+                    <td ${getStyle('played')}>${o.played}</td>
+                    <td ${getStyle('won')}>${o.won}</td>
+                    <td ${getStyle('drawn')}>${o.drawn}</td>
+                    <td ${getStyle('lost')}>${o.lost}</td>
+                    <td ${getStyle('goals_for')}>${o.goals_for}</td>
+                    <td ${getStyle('goals_against')}>${o.goals_against}</td>
+                    <td ${getStyle('goal_difference')}>${o.goal_difference}</td>
+                    <td ${getStyle('shootouts_won')}>${o.shootouts_won}-${o.shootouts_lost}</td>
+                </tr>`;
+        });
+
     } else {
         title.textContent = key.replace('season_', 'Stagione ').replace('_', '/');
         thead.innerHTML = `
@@ -155,6 +210,6 @@ function renderTable(key) {
     }
     
     if (players.length === 0) {
-        tbody.innerHTML = "<tr><td colspan='7'>No data available for this season.</td></tr>";
+        tbody.innerHTML = "<tr><td colspan='9'>No data available for this season.</td></tr>";
     }
 }
\ No newline at end of file
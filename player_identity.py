@@ -0,0 +1,294 @@
+"""
+Player identity resolution: which roster rows (the season sheets and STATS
+TOTALI.xlsx) are the same person, and which player a name in a match report
+(a scorer, a booked player, a goalkeeper) means.
+
+Names are compared on their tokens (aggregates.player_key: order, case and
+accents don't matter). Rosters are joined across seasons on the same tokens,
+then on near-identical ones ('Iannucceli' / 'Iannuccelli'), but never two
+names listed in the same season. An event name resolves to the player of its
+season's roster it fits best (exact tokens, a surname, an initial, a typo),
+and only if no one on that roster fits, to a player of another season.
+Candidates come from a blocking index (each token's first letters and its
+consonant skeleton), so a name is scored against a handful of players,
+not all of them; thefuzz scores the typos.
+
+Every player gets a stable id: the tokens of the oldest spelling in the
+archive ('davide-scocco'). New seasons don't change it.
+
+Manual overrides live in data/player_aliases.json:
+
+    {
+      "aliases": {"Written name": "Roster name"},             joined/resolved everywhere
+      "seasons": {"season_23_24": {"D'Ippolito": "Michele D'Ippolito"}},
+      "distinct": [["Name A", "Name B"]],                     never joined
+      "ignore": ["Autogol"]                                   not a player
+    }
+"""
+import json
+import os
+import re
+
+from aggregates import player_key
+
+# Scores (0-100) a name needs to join two roster names / to resolve an event name
+MERGE_SCORE = 90
+EVENT_SCORE = 85
+# Shorter tokens only match exactly or as a prefix: 'Re' is not 'Ra' at any score
+MIN_FUZZY_LENGTH = 4
+EXACT, PREFIX = 100, 95
+VOWELS_RE = re.compile(r'[aeiouyh]')
+REPEAT_RE = re.compile(r'(.)\1+')
+
+
+def load_aliases(path=None):
+    """Reads the alias file (see the module docstring); no file means no overrides."""
+    aliases = {"aliases": {}, "seasons": {}, "distinct": set(), "ignore": set()}
+    if not path or not os.path.exists(path):
+        return aliases
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    try:
+        aliases['aliases'] = {player_key(k): player_key(v) for k, v in raw.get('aliases', {}).items()}
+        aliases['seasons'] = {season: {player_key(k): player_key(v) for k, v in names.items()}
+                              for season, names in raw.get('seasons', {}).items()}
+        aliases['distinct'] = {frozenset(player_key(name) for name in pair) for pair in raw.get('distinct', [])}
+        aliases['ignore'] = {player_key(name) for name in raw.get('ignore', [])}
+    except (AttributeError, TypeError) as e:
+        raise ValueError(f"{path} is not a valid alias file: {e}")
+    return aliases
+
+
+def player_id(key):
+    """'davide scocco' -> 'davide-scocco'."""
+    return key.replace(' ', '-')
+
+
+# --- BLOCKING INDEX ---
+def blocking_keys(token):
+    """The first three letters and the consonants with doubles collapsed ('iannuccelli' -> 'ncl')."""
+    if len(token) < 3:
+        return []
+    keys = ['p:' + token[:3]]
+    skeleton = REPEAT_RE.sub(r'\1', VOWELS_RE.sub('', token))
+    if len(skeleton) >= 2:
+        keys.append('s:' + skeleton)
+    return keys
+
+
+class BlockingIndex:
+    """
+    Name keys by blocking key. A name can only fit a key whose tokens share a
+    blocking key with each of its own (initials and other short tokens aside),
+    so candidates() returns just those.
+    """
+
+    def __init__(self, keys=()):
+        self.postings = {}
+        for key in keys:
+            self.add(key)
+
+    def add(self, key):
+        for token in key.split():
+            for block in blocking_keys(token):
+                self.postings.setdefault(block, set()).add(key)
+
+    def candidates(self, tokens):
+        found = None
+        for token in tokens:
+            blocks = blocking_keys(token)
+            if not blocks:
+                continue
+            fits = set().union(*(self.postings.get(block, ()) for block in blocks))
+            found = fits if found is None else found & fits
+        return found or set()
+
+
+# --- SCORING ---
+def token_score(token, candidates):
+    """How well `token` matches the best of `candidates`: exact, a prefix (an initial), or a typo."""
+    from thefuzz import fuzz
+
+    best = 0
+    for candidate in candidates:
+        if candidate == token:
+            return EXACT
+        if candidate.startswith(token):
+            best = max(best, PREFIX)
+        elif len(token) >= MIN_FUZZY_LENGTH and len(candidate) >= MIN_FUZZY_LENGTH:
+            best = max(best, fuzz.ratio(token, candidate))
+    return best
+
+
+def name_score(tokens, candidate_tokens):
+    """The score of the worst-matching token: every token must fit the candidate."""
+    return min(token_score(token, candidate_tokens) for token in tokens)
+
+
+def same_person(key, other):
+    """
+    True if two roster names differ by typos only: as many tokens, each
+    exactly or nearly equal to a distinct token of the other, one at least exactly.
+    """
+    tokens, others = key.split(), other.split()
+    if len(tokens) != len(others) or not set(tokens) & set(others):
+        return False
+    unmatched = list(others)
+    for token in tokens:
+        if token in unmatched:
+            unmatched.remove(token)
+            continue
+        fits = [o for o in unmatched if o not in tokens and len(token) >= MIN_FUZZY_LENGTH
+                and len(o) >= MIN_FUZZY_LENGTH and token_score(token, [o]) >= MERGE_SCORE]
+        if not fits:
+            return False
+        unmatched.remove(fits[0])
+    return True
+
+
+# --- ROSTERS ---
+class Roster:
+    """
+    The players of the archive. `ids` maps every name key to its player id,
+    `names` every id to the name it's shown with (the newest spelling), and
+    `seasons` every season to {name key: player id} of its roster.
+    """
+
+    def __init__(self, ids, names, seasons):
+        self.ids = ids
+        self.names = names
+        self.seasons = seasons
+
+    def id_of(self, name):
+        return self.ids.get(player_key(name))
+
+
+def _find(parents, key):
+    while parents[key] != key:
+        parents[key] = parents[parents[key]]
+        key = parents[key]
+    return key
+
+
+def resolve_roster(rosters, aliases=None):
+    """
+    Joins the roster names into players. `rosters` is [(season, [names])],
+    newest season first, 'all_time' (the totals sheet) last.
+    """
+    aliases = aliases or load_aliases()
+    spellings = {}  # key -> name, newest spelling
+    seasons_of = {}  # key -> seasons it's listed in, newest first
+    for season, names in rosters:
+        for name in names:
+            key = player_key(name)
+            if not key:
+                continue
+            spellings.setdefault(key, name)
+            seasons_of.setdefault(key, [])
+            if season not in seasons_of[key]:
+                seasons_of[key].append(season)
+
+    order = {key: i for i, key in enumerate(spellings)}
+    parents = {key: key for key in spellings}
+    # Seasons each group is listed in ('all_time' too: the totals sheet has one row per player)
+    listed = {key: set(seasons) for key, seasons in seasons_of.items()}
+
+    def join(key, other):
+        root, other_root = _find(parents, key), _find(parents, other)
+        if root == other_root:
+            return
+        # The newer spelling stays the root (and so the name)
+        first, second = sorted((root, other_root), key=order.get)
+        parents[second] = first
+        listed[first] |= listed[second]
+
+    for alias, target in aliases['aliases'].items():
+        if alias in parents and target in parents:
+            join(target, alias)
+
+    index = BlockingIndex(spellings)
+    for key in spellings:
+        for other in sorted(index.candidates(key.split())):
+            if other == key or frozenset((key, other)) in aliases['distinct']:
+                continue
+            root, other_root = _find(parents, key), _find(parents, other)
+            # Two names on one season's roster are two players
+            if root != other_root and not listed[root] & listed[other_root] and same_person(key, other):
+                join(key, other)
+
+    season_order = {season: i for i, (season, _) in enumerate(rosters)}
+
+    def age(key):
+        # Position of the oldest season listing the spelling; the totals sheet only counts if that's all there is
+        return max((season_order[s] for s in seasons_of[key] if s != 'all_time'), default=-1)
+
+    groups = {}
+    for key in spellings:
+        groups.setdefault(_find(parents, key), []).append(key)
+    ids, names = {}, {}
+    for root, keys in groups.items():
+        # The oldest spelling names the id, so it outlives newer seasons
+        ident = player_id(max(keys, key=lambda k: (age(k), k)))
+        names[ident] = spellings[root]
+        for key in keys:
+            ids[key] = ident
+
+    by_season = {}
+    for key, seasons in seasons_of.items():
+        for season in seasons:
+            by_season.setdefault(season, {})[key] = ids[key]
+    return Roster(ids, names, by_season)
+
+
+# --- EVENT NAMES ---
+class EventResolver:
+    """
+    (season, event player name) -> id of the player it names, or None if it
+    names no one or could be several players. Results are cached: the same
+    few names come back in every match.
+    """
+
+    def __init__(self, seasons, ids, aliases=None):
+        # seasons: {season: {name key: player id}}, ids: {name key: player id} over the whole archive
+        self.seasons = seasons
+        self.ids = ids
+        self.aliases = aliases or load_aliases()
+        self.indexes = {}
+        self.resolved = {}
+
+    def _index(self, season):
+        if season not in self.indexes:
+            keys = self.ids if season is None else self.seasons.get(season, {})
+            self.indexes[season] = BlockingIndex(keys)
+        return self.indexes[season]
+
+    def _best(self, tokens, season):
+        """The ids fitting `tokens` best (with at least EVENT_SCORE) among the season's players (None: everyone's)."""
+        players = self.ids if season is None else self.seasons.get(season, {})
+        key = ' '.join(tokens)
+        if key in players:
+            return {players[key]}
+        scores = {}
+        for candidate in self._index(season).candidates(tokens):
+            score = name_score(tokens, candidate.split())
+            if score >= EVENT_SCORE:
+                scores[players[candidate]] = max(score, scores.get(players[candidate], 0))
+        top = max(scores.values(), default=None)
+        return {ident for ident, score in scores.items() if score == top}
+
+    def __call__(self, season, name):
+        if (season, name) not in self.resolved:
+            self.resolved[season, name] = self._resolve(season, name)
+        return self.resolved[season, name]
+
+    def _resolve(self, season, name):
+        key = player_key(name)
+        if not key or key in self.aliases['ignore']:
+            return None
+        target = self.aliases['seasons'].get(season, {}).get(key) or self.aliases['aliases'].get(key)
+        if target:
+            return self.ids.get(target)
+        tokens = key.split()
+        # Whoever fits on the season's roster; someone from another season only if no one does
+        fits = self._best(tokens, season) or self._best(tokens, None)
+        return fits.pop() if len(fits) == 1 else None
@@ -0,0 +1,131 @@
+"""
+Build-time search index over players, seasons, matches and declarations.
+
+Every searchable thing becomes a small document in the "search/docs" shard:
+
+    {"type": "player", "label": "Davide Scocco", "seasons": ["season_25_26", ...]}
+    {"type": "match", "label": "2025-11-11 ASD Roma70 4-4", "date": ..., "season": ..., "opponent": ...}
+    {"type": "declaration", "label": "CESSIONE A TITOLO ...", "date": ...}
+    {"type": "season", "label": "Stagione 2025/26", "season": "season_25_26"}
+
+and every token of its searchable fields points back to it from an inverted
+index. Tokens are case- and accent-folded ('Città' -> 'citta'); dates are kept
+whole ('2025-11-11') so '2025' or '2025-11' find them by prefix.
+
+The postings are split by the first two characters of each token into
+"search/terms/<prefix>" shards ({token: [[doc id, weight], ...]}), so a query
+only loads the shards its words start with, and type-ahead is a prefix scan
+over one small shard. js/search.js runs the queries (skipping the same
+stopwords, shipped as "search/stopwords").
+"""
+import re
+from collections import defaultdict
+
+from text_utils import fold
+
+PREFIX_LENGTH = 2
+TOKEN_RE = re.compile(r'\d{4}-\d{2}-\d{2}|[a-z0-9]+')
+# Field weights: a hit in a name or title ranks above one in a body
+WEIGHTS = {'name': 4, 'title': 3, 'opponent': 3, 'date': 2, 'season': 1, 'scorers': 1, 'content': 1}
+STOPWORDS = {
+    'il', 'lo', 'la', 'le', 'gli', 'un', 'una', 'di', 'da', 'in', 'con', 'su', 'per', 'tra', 'fra',
+    'del', 'dei', 'della', 'delle', 'al', 'ai', 'alla', 'alle', 'nel', 'nella', 'sul', 'sulla',
+    'che', 'non', 'ha', 'ed', 'si', 'ci', 'come', 'anche', 'sono', 'questo', 'questa'
+}
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(fold(text)) if len(t) >= 2 and t not in STOPWORDS]
+
+
+def season_label(key):
+    """'season_25_26' -> 'Stagione 2025/26'."""
+    start, end = key.replace('season_', '').split('_')
+    return f"Stagione 20{start}/{end}"
+
+
+def season_text(key):
+    # Both '2025/26' and '2025/2026' style queries should hit the season
+    start, end = key.replace('season_', '').split('_')
+    return f"{season_label(key)} 20{end} {start}/{end}"
+
+
+class SearchIndex:
+    def __init__(self):
+        self.docs = []
+        self.postings = defaultdict(dict)  # token -> {doc id: weight}
+
+    def add(self, doc, fields):
+        """Adds a document; `fields` maps a WEIGHTS key to the text to index under it."""
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        for field, text in fields.items():
+            # A token counts once per field, however often the field repeats it
+            for token in set(tokenize(text)):
+                postings = self.postings[token]
+                postings[doc_id] = postings.get(doc_id, 0) + WEIGHTS[field]
+        return doc_id
+
+    def shards(self):
+        terms = defaultdict(dict)
+        for token in sorted(self.postings):
+            terms[token[:PREFIX_LENGTH]][token] = sorted(self.postings[token].items())
+        # The browser drops the same words from queries
+        shards = {'search/docs': self.docs, 'search/stopwords': sorted(STOPWORDS)}
+        for prefix, entries in sorted(terms.items()):
+            shards[f'search/terms/{prefix}'] = {t: [list(p) for p in posting] for t, posting in entries.items()}
+        return shards
+
+
+def build_search_shards(final_data, seasons):
+    """
+    Indexes the records already in final_data (season stats, 'all_time',
+    'matches', 'declarations') and returns the search shards.
+    `seasons` are the season keys, newest first.
+    """
+    index = SearchIndex()
+
+    for key in seasons:
+        index.add({"type": "season", "label": season_label(key), "season": key}, {'season': season_text(key)})
+
+    # One document per player, however the name is written ('Ludovico Campana' / 'Campana Ludovico',
+    # or any spelling the build joined under one player id); every spelling finds it
+    players = {}
+    spellings = {}
+    for key in seasons + ['all_time']:
+        for row in final_data.get(key, []):
+            name = str(row.get('name', '')).strip()
+            identity = tuple(sorted(tokenize(name)))
+            if not identity:
+                continue
+            identity = row.get('player_id') or identity
+            if identity not in players:
+                players[identity] = {"type": "player", "label": name, "seasons": []}
+                spellings[identity] = []
+            if name not in spellings[identity]:
+                spellings[identity].append(name)
+            if key != 'all_time' and key not in players[identity]['seasons']:
+                players[identity]['seasons'].append(key)
+    for identity, player in players.items():
+        index.add(player, {'name': ' '.join(spellings[identity])})
+
+    for match in final_data.get('matches', []):
+        doc = {
+            "type": "match",
+            "label": f"{match['date']} {match['opponent']} {match['score']}",
+            "date": match['date'],
+            "season": match['season'],
+            "opponent": match['opponent']
+        }
+        index.add(doc, {
+            'opponent': match['opponent'],
+            'date': match['date'],
+            'season': season_text(match['season']),
+            'scorers': ' '.join(match.get('scorers', []))
+        })
+
+    for post in final_data.get('declarations', []):
+        doc = {"type": "declaration", "label": post['title'], "date": post['date']}
+        index.add(doc, {'title': post['title'], 'date': post['date'], 'content': post['content']})
+
+    return index.shards()
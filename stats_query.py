@@ -0,0 +1,147 @@
+"""
+Queries over the stats store (data/stats.sqlite, written by the build, see
+stats_store.py) for analysis scripts:
+
+    conn = stats_query.connect()
+    stats_query.matches_against(conn, 'Birra Real')     # every match vs an opponent
+    stats_query.player_seasons(conn, 'Scocco')          # season-by-season stats
+    stats_query.top_scorers(conn, season='season_24_25')
+
+Names are matched on their tokens like the build matches them (accents, case
+and word order don't matter; a surname or an initial is enough if it fits one
+player only), against every spelling the build joined into each player.
+Every function returns plain dicts. From the command line:
+
+    python stats_query.py opponent "Birra Real"
+    python stats_query.py player Scocco
+    python stats_query.py scorers [SEASON]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+from aggregates import opponent_key, player_key
+
+DEFAULT_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'stats.sqlite')
+
+
+def connect(path=DEFAULT_DB_FILE):
+    """Opens the store read-only."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found: run build_script.py first")
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _rows(cursor):
+    return [dict(row) for row in cursor]
+
+
+def find_players(conn, name):
+    """Players `name` refers to: a spelling with the same tokens, else every player whose tokens it fits."""
+    key = player_key(name)
+    if not key:
+        return []
+    query = 'SELECT DISTINCT p.id, p.name FROM player_names n JOIN players p ON p.id = n.player_id'
+    exact = _rows(conn.execute(query + ' WHERE n.key = ?', (key,)))
+    if exact:
+        return exact
+    tokens = key.split()
+    players = {}
+    for row in conn.execute('SELECT n.key, p.id, p.name FROM player_names n JOIN players p ON p.id = n.player_id '
+                            'ORDER BY p.name'):
+        if all(any(part.startswith(t) for part in row['key'].split()) for t in tokens):
+            players.setdefault(row['id'], {"id": row['id'], "name": row['name']})
+    return list(players.values())
+
+
+def player_seasons(conn, name):
+    """
+    Season-by-season stats (newest first) of the player `name` refers to,
+    with the goals credited to them in the match reports ('match_goals').
+    Rows of several players are returned when the name is ambiguous.
+    """
+    players = find_players(conn, name)
+    if not players:
+        return []
+    marks = ','.join('?' * len(players))
+    return _rows(conn.execute(
+        f"""SELECT p.name AS player, s.season, s.number, s.apps, s.goals, s.assists, s.yellow_cards, s.red_cards,
+                   (SELECT COALESCE(SUM(e.count), 0) FROM events e JOIN matches m ON m.id = e.match_id
+                    WHERE e.player_id = s.player_id AND m.season = s.season
+                      AND e.type IN ('goal', 'penalty')) AS match_goals
+            FROM season_stats s
+            JOIN players p ON p.id = s.player_id
+            JOIN seasons ON seasons.key = s.season
+            WHERE s.player_id IN ({marks})
+            ORDER BY p.name, seasons.position""",
+        [p['id'] for p in players]))
+
+
+def matches_against(conn, opponent):
+    """Every match (newest first) against the opponent: its exact name, else every opponent it starts."""
+    key = opponent_key(opponent)
+    if not key:
+        return []
+    query = ('SELECT id, date, season, opponent, home_status, score, result, shootout_score, '
+             'goals_for, goals_against, video_id FROM matches WHERE {} ORDER BY date DESC, id')
+    rows = _rows(conn.execute(query.format('opponent_key = ?'), (key,)))
+    if not rows:
+        # opponent_key is indexed: a prefix is a range scan
+        rows = _rows(conn.execute(query.format('opponent_key >= ? AND opponent_key < ?'), (key, key + '\uffff')))
+    return rows
+
+
+def match_events(conn, match_id):
+    """Goals, cards and saved penalties of one match, in sheet order."""
+    return _rows(conn.execute(
+        'SELECT e.type, e.player, e.count, p.name AS resolved_player FROM events e '
+        'LEFT JOIN players p ON p.id = e.player_id WHERE e.match_id = ? ORDER BY e.position', (match_id,)))
+
+
+def top_scorers(conn, season=None, limit=10):
+    """Most goals in one season (or over every season) according to the stats sheets."""
+    where, params = ('WHERE s.season = ?', [season]) if season else ('', [])
+    return _rows(conn.execute(
+        f"""SELECT p.name AS player, SUM(s.goals) AS goals, SUM(s.apps) AS apps, COUNT(*) AS seasons
+            FROM season_stats s JOIN players p ON p.id = s.player_id
+            {where}
+            GROUP BY s.player_id HAVING SUM(s.goals) > 0
+            ORDER BY goals DESC, p.name LIMIT ?""",
+        params + [limit]))
+
+
+def _print_rows(rows):
+    if not rows:
+        print("No results.")
+        return
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queries the stats store written by build_script.py.")
+    parser.add_argument('--db', default=DEFAULT_DB_FILE, help="Store to query (default: data/stats.sqlite).")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('opponent', help="Every match against an opponent.").add_argument('name')
+    commands.add_parser('player', help="A player's season-by-season stats.").add_argument('name')
+    commands.add_parser('scorers', help="Top scorers, overall or in one season.").add_argument('season', nargs='?')
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == 'opponent':
+        _print_rows(matches_against(conn, args.name))
+    elif args.command == 'player':
+        _print_rows(player_seasons(conn, args.name))
+    else:
+        _print_rows(top_scorers(conn, season=args.season))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+SQLite store of the parsed season data (data/stats.sqlite).
+
+The build writes every season's player stats, the all-time totals, the
+matches with their events and the linked videos into normalized tables:
+
+    seasons       key, position (newest first)
+    players       id (stable, see player_identity.py), name
+    player_names  every spelling's key (name tokens, see aggregates.player_key) -> player
+    season_stats  one row per player and season (NULL where a stat isn't tracked)
+    all_time      the rows of STATS TOTALI.xlsx
+    matches       one row per match, with its goals for/against and preferred video
+    events        goals, cards and saved penalties of each match (see
+                  build_script.tokenize_event), linked to the player the name
+                  identifies (see player_identity.EventResolver)
+    videos        linked videos; match_videos says which match each belongs to
+
+export() reads them back in exactly the shape the JSON output has, so the
+shards are a view of the store. stats_query.py answers questions on top of it.
+Player ids are stable across builds as long as the player's oldest spelling is.
+"""
+import contextlib
+import os
+import sqlite3
+
+import player_identity
+from aggregates import match_goals, opponent_key, player_key
+
+SCHEMA_VERSION = 2
+STAT_COLUMNS = ['apps', 'goals', 'assists', 'yellow_cards', 'red_cards']
+# The match list each event type is listed in (see build_script.tokenize_event)
+EVENT_LISTS = {
+    'goal': 'scorers', 'penalty': 'scorers', 'yellow_card': 'yellow_cards_recipients',
+    'red_card': 'red_cards_recipients', 'saved_penalty': 'saved_penalty_goalkeepers'
+}
+
+SCHEMA = [
+    """CREATE TABLE seasons (
+        key TEXT PRIMARY KEY,
+        position INTEGER NOT NULL
+    )""",
+    """CREATE TABLE players (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL
+    )""",
+    """CREATE TABLE player_names (
+        key TEXT PRIMARY KEY,
+        player_id TEXT NOT NULL REFERENCES players(id)
+    )""",
+    "CREATE INDEX player_names_player ON player_names (player_id)",
+    """CREATE TABLE season_stats (
+        season TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        player_id TEXT REFERENCES players(id),
+        name TEXT NOT NULL,
+        number TEXT,
+        apps INTEGER, goals INTEGER, assists INTEGER, yellow_cards INTEGER, red_cards INTEGER,
+        PRIMARY KEY (season, position)
+    )""",
+    "CREATE INDEX season_stats_player ON season_stats (player_id)",
+    """CREATE TABLE all_time (
+        position INTEGER PRIMARY KEY,
+        player_id TEXT REFERENCES players(id),
+        name TEXT NOT NULL,
+        role TEXT,
+        total_apps INTEGER, total_goals INTEGER, total_assists INTEGER
+    )""",
+    "CREATE INDEX all_time_player ON all_time (player_id)",
+    """CREATE TABLE matches (
+        id INTEGER PRIMARY KEY,
+        season TEXT NOT NULL,
+        date TEXT NOT NULL,
+        opponent TEXT NOT NULL,
+        opponent_key TEXT NOT NULL,
+        score TEXT,
+        result TEXT,
+        shootout_score TEXT,
+        home_status TEXT,
+        goals_for INTEGER,
+        goals_against INTEGER,
+        video_id TEXT
+    )""",
+    "CREATE INDEX matches_opponent ON matches (opponent_key, date)",
+    "CREATE INDEX matches_season ON matches (season, date)",
+    "CREATE INDEX matches_date ON matches (date)",
+    """CREATE TABLE events (
+        match_id INTEGER NOT NULL REFERENCES matches(id),
+        position INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        player_id TEXT REFERENCES players(id),
+        player TEXT NOT NULL,
+        label TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (match_id, position)
+    )""",
+    "CREATE INDEX events_player ON events (player_id, type)",
+    "CREATE INDEX events_type ON events (type)",
+    """CREATE TABLE videos (
+        id TEXT PRIMARY KEY,
+        title TEXT
+    )""",
+    """CREATE TABLE match_videos (
+        match_id INTEGER NOT NULL REFERENCES matches(id),
+        position INTEGER NOT NULL,
+        video_id TEXT NOT NULL REFERENCES videos(id),
+        kind TEXT,
+        PRIMARY KEY (match_id, position)
+    )""",
+    "CREATE INDEX match_videos_video ON match_videos (video_id)",
+]
+TABLES = ['match_videos', 'videos', 'events', 'matches', 'all_time', 'season_stats', 'player_names', 'players',
+          'seasons']
+
+
+@contextlib.contextmanager
+def transaction(conn):
+    """Everything inside is committed at once (or not at all), so readers never see half a build."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def open_store(path, reset=False):
+    """
+    Opens the store for writing. reset=True (a full build) starts it over;
+    otherwise it must already exist with the current schema.
+    """
+    if not reset and not os.path.exists(path):
+        raise ValueError(f"no stats store at {path}; run 'build all' first")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None)
+    # A crash mid-build can't corrupt it (the journal still makes each save atomic), and
+    # an OS crash only costs a rebuild: don't wait for the disk on every commit
+    conn.execute('PRAGMA synchronous = OFF')
+    if reset:
+        with transaction(conn):
+            for table in TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    elif conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        conn.close()
+        raise ValueError(f"{path} was written by another version of the build; run 'build all'")
+    return conn
+
+
+# --- WRITING ---
+def _stat(value):
+    # '-' marks a stat the season's sheet doesn't track
+    return None if value == '-' else value
+
+
+def save_stats(conn, season_data, seasons, aliases=None):
+    """
+    Replaces the seasons, their player stats, the all-time totals and the
+    players they're joined into (`seasons` newest first), and re-links the
+    stored match events to the new roster.
+    """
+    rosters = [(key, [row['name'] for row in season_data.get(key, [])]) for key in seasons]
+    rosters.append(('all_time', [row['name'] for row in season_data.get('all_time', [])]))
+    roster = player_identity.resolve_roster(rosters, aliases)
+    with transaction(conn):
+        for table in ('seasons', 'season_stats', 'all_time', 'player_names', 'players'):
+            conn.execute(f"DELETE FROM {table}")
+        conn.executemany('INSERT INTO players (id, name) VALUES (?, ?)', list(roster.names.items()))
+        conn.executemany('INSERT INTO player_names (key, player_id) VALUES (?, ?)', list(roster.ids.items()))
+        conn.executemany('INSERT INTO seasons (key, position) VALUES (?, ?)',
+                         [(key, i) for i, key in enumerate(seasons)])
+        for key in seasons:
+            conn.executemany(
+                'INSERT INTO season_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(key, i, roster.id_of(row['name']), row['name'], row['number'], *(_stat(row[c]) for c in STAT_COLUMNS))
+                 for i, row in enumerate(season_data.get(key, []))])
+        conn.executemany(
+            'INSERT INTO all_time VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(i, roster.id_of(row['name']), row['name'], row['role'],
+              row['total_apps'], row['total_goals'], row['total_assists'])
+             for i, row in enumerate(season_data.get('all_time', []))])
+        link_events(conn, aliases)
+
+
+def save_matches(conn, matches, aliases=None):
+    """Replaces the matches, their events and videos (`matches` in output order, newest first)."""
+    with transaction(conn):
+        for table in ('match_videos', 'videos', 'events', 'matches'):
+            conn.execute(f"DELETE FROM {table}")
+        player_of = event_players(conn, aliases)
+        match_rows, event_rows, video_rows, link_rows = [], [], {}, []
+        for match_id, match in enumerate(matches, 1):
+            goals = match_goals(match) or (None, None)
+            match_rows.append((
+                match_id, match['season'], match['date'], match['opponent'], opponent_key(match['opponent']),
+                match['score'], match['result'], match['shootout_score'], match['home_status'],
+                goals[0], goals[1], match.get('videoId')
+            ))
+            # Each event is listed, in order, in one of the match's name lists: pair them up
+            labels = {name: iter(match[name]) for name in set(EVENT_LISTS.values())}
+            for position, event in enumerate(match.get('events', [])):
+                label = next(labels[EVENT_LISTS[event['type']]], event['player'])
+                event_rows.append((match_id, position, event['type'], player_of(match['season'], event['player']),
+                                   event['player'], label, event['count']))
+            for position, video in enumerate(match.get('videos', [])):
+                video_rows[video['videoId']] = (video['videoId'], video['title'])
+                link_rows.append((match_id, position, video['videoId'], video['kind']))
+        conn.executemany('INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', match_rows)
+        conn.executemany('INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)', event_rows)
+        conn.executemany('INSERT INTO videos VALUES (?, ?)', list(video_rows.values()))
+        conn.executemany('INSERT INTO match_videos VALUES (?, ?, ?, ?)', link_rows)
+
+
+def event_players(conn, aliases=None):
+    """A player_identity.EventResolver over the stored rosters."""
+    seasons = {}
+    for season, name, ident in conn.execute('SELECT season, name, player_id FROM season_stats WHERE player_id IS NOT NULL'):
+        seasons.setdefault(season, {})[player_key(name)] = ident
+    return player_identity.EventResolver(seasons, dict(conn.execute('SELECT key, player_id FROM player_names')), aliases)
+
+
+def link_events(conn, aliases=None):
+    """Points every stored event at the player it names (NULL if none or ambiguous)."""
+    player_of = event_players(conn, aliases)
+    updates = [(player_of(season, player), match_id, position) for match_id, position, season, player in conn.execute(
+        'SELECT e.match_id, e.position, m.season, e.player FROM events e JOIN matches m ON m.id = e.match_id')]
+    conn.executemany('UPDATE events SET player_id = ? WHERE match_id = ? AND position = ?', updates)
+
+
+# --- EXPORT ---
+def export(conn, sections=('stats', 'matches')):
+    """
+    The stored data in the build's output shape: season keys and 'all_time'
+    for 'stats', 'matches' (newest first) for 'matches'.
+    """
+    data = {}
+    if 'stats' in sections:
+        seasons = [key for key, in conn.execute('SELECT key FROM seasons ORDER BY position')]
+        for key in seasons:
+            data[key] = []
+        for row in conn.execute(
+                'SELECT s.season, s.name, s.player_id, s.number, s.apps, s.goals, s.assists, s.yellow_cards, '
+                's.red_cards FROM season_stats s JOIN seasons ON seasons.key = s.season '
+                'ORDER BY seasons.position, s.position'):
+            record = {"name": row[1], "player_id": row[2], "number": row[3]}
+            for col, value in zip(STAT_COLUMNS, row[4:]):
+                record[col] = '-' if value is None else value
+            data[row[0]].append(record)
+        data['all_time'] = [
+            {"name": name, "player_id": ident, "role": role,
+             "total_apps": apps, "total_goals": goals, "total_assists": assists}
+            for name, ident, role, apps, goals, assists in conn.execute(
+                'SELECT name, player_id, role, total_apps, total_goals, total_assists FROM all_time ORDER BY position')]
+
+    if 'matches' in sections:
+        events = {}
+        for match_id, event_type, player, ident, label, count in conn.execute(
+                'SELECT match_id, type, player, player_id, label, count FROM events ORDER BY match_id, position'):
+            events.setdefault(match_id, []).append((event_type, player, ident, label, count))
+        videos = {}
+        for match_id, video_id, title, kind in conn.execute(
+                'SELECT mv.match_id, mv.video_id, v.title, mv.kind FROM match_videos mv '
+                'JOIN videos v ON v.id = mv.video_id ORDER BY mv.match_id, mv.position'):
+            videos.setdefault(match_id, []).append({"videoId": video_id, "title": title, "kind": kind})
+
+        matches = []
+        for (match_id, season, date, opponent, score, result, shootout_score, home_status,
+             video_id) in conn.execute(
+                'SELECT id, season, date, opponent, score, result, shootout_score, home_status, video_id '
+                'FROM matches ORDER BY id'):
+            match = {"date": date, "opponent": opponent, "score": score, "result": result}
+            for name in ('scorers', 'yellow_cards_recipients', 'red_cards_recipients', 'saved_penalty_goalkeepers'):
+                match[name] = []
+            match['events'] = []
+            for event_type, player, ident, label, count in events.get(match_id, []):
+                match[EVENT_LISTS[event_type]].append(label)
+                match['events'].append({"type": event_type, "player": player, "player_id": ident, "count": count})
+            match.update({"shootout_score": shootout_score, "season": season, "home_status": home_status})
+            if match_id in videos:
+                match['videos'] = videos[match_id]
+                match['videoId'] = video_id
+            matches.append(match)
+        data['matches'] = matches
+    return data
@@ -0,0 +1,11 @@
+"""
+Text helpers shared by the build's matching and search code (player and
+opponent keys, video titles, the search index).
+"""
+import unicodedata
+
+
+def fold(text):
+    """Lowercase, accents stripped ('Città' -> 'citta')."""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
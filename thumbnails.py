@@ -0,0 +1,235 @@
+"""
+Gallery image pipeline: responsive variants, placeholders and layout metadata.
+
+Every original in images/gallery gets resized copies in images/gallery/thumbnails/
+at each width in VARIANT_WIDTHS (never upscaled) and in each output format
+(WebP and JPEG, plus AVIF when enabled), and a tiny blurred placeholder that
+is inlined in the gallery data. The gallery entry for a photo becomes
+
+    {"file": "IMG-1.jpg", "width": 1600, "height": 1200, "placeholder": "data:image/webp;base64,...",
+     "src": "images/gallery/thumbnails/IMG-1_jpg-400w.jpg",
+     "srcset": {"webp": "...-400w.webp 400w, ...-800w.webp 800w", "jpeg": "..."}}
+
+so the page can pick a size with srcset and reserve the space up front.
+
+Variants are (re)generated only when the original is new or has changed:
+each original's size/mtime, content hash and resulting entry are remembered
+in .build_cache/thumbnails.json, and the hash is only recomputed when size or
+mtime moved (so a `touch` or a re-copied identical file costs no decode).
+Files whose original was deleted are removed.
+
+With legacy=True (the build's --legacy-cache) each original also keeps an
+old-style thumbnail under its own name (images/gallery/thumbnails/IMG-1.jpg,
+at most LEGACY_THUMBNAIL_SIZE a side), which the pre-shard gallery.js loads.
+
+Decoding runs on a process pool. JPEGs are opened in draft mode, which lets
+libjpeg downscale by 1/2, 1/4 or 1/8 while decoding instead of decoding the
+full-resolution phone photo first, and EXIF orientation is applied so
+portrait shots aren't shown sideways.
+"""
+import base64
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps, features
+
+from file_utils import file_hash, write_atomic
+
+VARIANT_WIDTHS = (400, 800, 1600)
+PLACEHOLDER_WIDTH = 16
+LEGACY_THUMBNAIL_SIZE = 400
+FORMATS = {
+    # name: (Pillow format, file extension, save options)
+    'avif': ('AVIF', 'avif', {'quality': 50}),
+    'webp': ('WEBP', 'webp', {'quality': 75, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+DEFAULT_FORMATS = ('webp', 'jpeg')
+
+
+def available_formats(with_avif=False):
+    """Output formats this Pillow build can write (JPEG always; AVIF only on request)."""
+    wanted = ('avif',) + DEFAULT_FORMATS if with_avif else DEFAULT_FORMATS
+    return tuple(name for name in wanted if name == 'jpeg' or features.check(name))
+
+
+def variant_name(filename, width, extension):
+    # The original's extension stays in the name so IMG.jpg and IMG.png can't collide
+    return f"{filename.replace('.', '_')}-{width}w.{extension}"
+
+
+def target_widths(original_width):
+    widths = [w for w in VARIANT_WIDTHS if w < original_width]
+    widths.append(min(original_width, VARIANT_WIDTHS[-1]))
+    return sorted(set(widths))
+
+
+def _save(img, path, pil_format, options):
+    buffer = io.BytesIO()
+    img.save(buffer, format=pil_format, **options)
+    write_atomic(path, buffer.getvalue())
+
+
+def make_variants(original_path, out_dir, url_prefix, formats, legacy=False):
+    """
+    Writes every variant of one original (and with legacy=True its old-style
+    thumbnail) and returns its gallery entry.
+    Returns (entry, None) on success, (None, error message) otherwise.
+    """
+    filename = os.path.basename(original_path)
+    try:
+        with Image.open(original_path) as img:
+            # Full-resolution size, as displayed (after EXIF rotation)
+            width, height = img.size
+            rotated = img.getexif().get(0x0112, 1) in (5, 6, 7, 8)
+            if rotated:
+                width, height = height, width
+
+            # JPEG only: decode at the smallest 1/n scale that still covers the largest
+            # variant. The box keeps the photo's aspect and is given in stored orientation,
+            # so a 4032x3024 original decodes at 2016x1512 for a 1600w variant.
+            largest = min(width, VARIANT_WIDTHS[-1])
+            box = (largest, max(1, -(-height * largest // width)))
+            img.draft('RGB', box[::-1] if rotated else box)
+            img = ImageOps.exif_transpose(img)
+
+            # Convert to RGB to avoid errors with PNGs/Transparency
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+
+            srcset = {name: [] for name in formats}
+            src = None
+            for target in target_widths(width):
+                resized = img.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+                for name in formats:
+                    pil_format, extension, options = FORMATS[name]
+                    out_name = variant_name(filename, target, extension)
+                    _save(resized, os.path.join(out_dir, out_name), pil_format, options)
+                    srcset[name].append(f"{url_prefix}{out_name} {target}w")
+                    if name == 'jpeg' and src is None:
+                        src = f"{url_prefix}{out_name}"
+
+            if legacy:
+                thumbnail = img.copy()
+                thumbnail.thumbnail((LEGACY_THUMBNAIL_SIZE, LEGACY_THUMBNAIL_SIZE))
+                pil_format = Image.registered_extensions()[os.path.splitext(filename)[1].lower()]
+                _save(thumbnail, os.path.join(out_dir, filename), pil_format, {'quality': 80, 'optimize': True})
+
+            # WebP keeps the inlined placeholder ~10x smaller than a JPEG (no quantization tables)
+            tiny = img.resize((PLACEHOLDER_WIDTH, max(1, round(height * PLACEHOLDER_WIDTH / width))), Image.BILINEAR)
+            tiny_format = 'webp' if 'webp' in formats else 'jpeg'
+            buffer = io.BytesIO()
+            tiny.save(buffer, format=FORMATS[tiny_format][0], quality=50)
+            placeholder = f"data:image/{tiny_format};base64," + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+        return {
+            "file": filename,
+            "width": width,
+            "height": height,
+            "placeholder": placeholder,
+            "src": src,
+            "srcset": {name: ", ".join(entries) for name, entries in srcset.items()}
+        }, None
+    except Exception as e:
+        return None, str(e)
+
+
+def _expected_files(entry):
+    files = {os.path.basename(entry['src'])}
+    for srcset in entry['srcset'].values():
+        files.update(os.path.basename(item.rsplit(' ', 1)[0]) for item in srcset.split(', '))
+    return files
+
+
+def _load_state(state_path):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state_path, state):
+    write_atomic(state_path, json.dumps(state, indent=1).encode('utf-8'))
+
+
+def update_gallery(gallery_dir, out_dir, url_prefix, filenames, state_path, jobs=1, formats=DEFAULT_FORMATS,
+                   pool=None, legacy=False):
+    """
+    Brings out_dir in line with the originals in `filenames` (with their
+    old-style thumbnails if `legacy`, see the module docstring) and returns
+    (entries in `filenames` order, {'generated', 'unchanged', 'removed', 'errors'}).
+    Originals that fail to decode are left out of the entries.
+    The variants are made on `pool` (a running ProcessPoolExecutor) if given,
+    else on a pool of up to `jobs` processes.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    # Changing widths/formats/prefix invalidates every stored entry
+    settings = {"widths": list(VARIANT_WIDTHS), "formats": list(formats), "url_prefix": url_prefix}
+    old_state = _load_state(state_path)
+    old_images = old_state.get('images', {}) if old_state.get('settings') == settings else {}
+    images = {}
+    todo = []
+
+    for filename in filenames:
+        original_path = os.path.join(gallery_dir, filename)
+        stat = os.stat(original_path)
+        record = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        previous = old_images.get(filename, {})
+
+        if (previous.get('size'), previous.get('mtime_ns')) == (record['size'], record['mtime_ns']):
+            record['sha256'] = previous.get('sha256')
+        else:
+            record['sha256'] = file_hash(original_path)
+
+        entry = previous.get('entry')
+        if (entry and record['sha256'] == previous.get('sha256')
+                and all(os.path.exists(os.path.join(out_dir, f)) for f in _expected_files(entry))
+                and not (legacy and not os.path.exists(os.path.join(out_dir, filename)))):
+            record['entry'] = entry
+        else:
+            todo.append(filename)
+        images[filename] = record
+
+    paths = [os.path.join(gallery_dir, filename) for filename in todo]
+    variant_args = (paths, [out_dir] * len(paths), [url_prefix] * len(paths), [formats] * len(paths),
+                    [legacy] * len(paths))
+    if pool is not None and len(todo) > 1:
+        results = list(pool.map(make_variants, *variant_args))
+    elif jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as own_pool:
+            results = list(own_pool.map(make_variants, *variant_args, chunksize=2))
+    else:
+        results = [make_variants(path, out_dir, url_prefix, formats, legacy) for path in paths]
+
+    errors = {}
+    for filename, (entry, error) in zip(todo, results):
+        if error:
+            errors[filename] = error
+            del images[filename]  # retry on the next build
+        else:
+            images[filename]['entry'] = entry
+
+    # Variants whose original is gone, and old-style thumbnails unless `legacy`
+    wanted = set()
+    for filename, record in images.items():
+        wanted.update(_expected_files(record['entry']))
+        if legacy:
+            wanted.add(filename)
+    removed = 0
+    for name in os.listdir(out_dir):
+        path = os.path.join(out_dir, name)
+        if name not in wanted and os.path.isfile(path):
+            os.remove(path)
+            removed += 1
+
+    _save_state(state_path, {"settings": settings, "images": images})
+    entries = [images[filename]['entry'] for filename in filenames if filename in images]
+    return entries, {
+        'generated': len(todo) - len(errors),
+        'unchanged': len(filenames) - len(todo),
+        'removed': removed,
+        'errors': errors
+    }
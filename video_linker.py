@@ -0,0 +1,187 @@
+"""
+Links YouTube videos to matches.
+
+Videos are bucketed by upload date and their titles folded once, so each
+match only looks at the videos uploaded the day before, the same day or the
+day after it (O(matches + videos) instead of matches x videos).
+
+Candidates must mention the team in the title (as before) and the opponent
+or the score of the match; they are then scored on that evidence:
+
+    opponent name tokens in the title     +2.0
+    the match score in the title          +1.5
+    uploaded on the match day             +0.5
+
+A team upload with neither (a training session, an interview) is linked to
+no match. Every other video goes to its best-scoring match, and a match can
+keep several videos (e.g. highlights and the full match). Matches with no
+video, team videos no match claimed, and videos tied between two matches are
+reported.
+"""
+import datetime
+import re
+from collections import defaultdict
+
+from text_utils import fold
+
+TEAM_ALIASES = ('tamarindi', 'palermo', 'tamardini')
+# Words that say nothing about which opponent a title refers to
+GENERIC_TOKENS = {
+    'fc', 'asd', 'ssd', 'ac', 'as', 'us', 'ss', 'sc', 'calcio', 'club', 'team', 'sporting',
+    'vs', 'the', 'and', 'del', 'della', 'di', 'de', 'la', 'il', 'lo', 'real', 'united'
+}
+KIND_KEYWORDS = [
+    ('full', ('partita completa', 'integrale', 'full match', 'primo tempo', 'secondo tempo')),
+    ('highlights', ('highlights', 'highlight', 'sintesi')),
+]
+KIND_PRIORITY = {'highlights': 0, 'video': 1, 'full': 2}
+WINDOW_DAYS = 1
+
+SCORE_RE = re.compile(r'(\d{1,2})\s*[-–:]\s*(\d{1,2})')
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def opponent_tokens(opponent):
+    tokens = set(TOKEN_RE.findall(fold(opponent)))
+    return {t for t in tokens if len(t) >= 3 and t not in GENERIC_TOKENS} or tokens
+
+
+def video_kind(normalized_title):
+    for kind, keywords in KIND_KEYWORDS:
+        if any(keyword in normalized_title for keyword in keywords):
+            return kind
+    return 'video'
+
+
+class VideoBuckets:
+    """Videos bucketed by upload date, with titles pre-processed once."""
+
+    def __init__(self, videos):
+        self.by_date = defaultdict(list)
+        for order, video in enumerate(videos):
+            # Cheap team check first: most uploads on a channel are other teams' matches
+            if not any(name in video['title'].lower().replace(' ', '') for name in TEAM_ALIASES):
+                continue
+            title = fold(video['title'])
+            compact = re.sub(r'[^a-z0-9]', '', title)
+            self.by_date[video['publishedAt'].date()].append({
+                'order': order,
+                'video': video,
+                'tokens': set(TOKEN_RE.findall(title)),
+                'compact': compact,
+                'scores': {(int(a), int(b)) for a, b in SCORE_RE.findall(title)},
+                'kind': video_kind(title),
+            })
+
+    def candidates(self, match_date):
+        for offset in range(-WINDOW_DAYS, WINDOW_DAYS + 1):
+            day = match_date + datetime.timedelta(days=offset)
+            for entry in self.by_date.get(day, ()):
+                yield abs(offset), entry
+
+
+def _match_score_tokens(score):
+    parts = str(score).split('-')
+    if len(parts) == 2 and parts[0].strip().isdigit() and parts[1].strip().isdigit():
+        a, b = int(parts[0]), int(parts[1])
+        return {(a, b), (b, a)}
+    return set()
+
+
+def score_candidate(match_info, delta, entry):
+    """The video's score for the match, or None if its title names neither the opponent nor the score."""
+    score = 0.0
+    tokens = match_info['opponent_tokens']
+    if tokens and (tokens <= entry['tokens'] or match_info['opponent_compact'] in entry['compact']):
+        score += 2.0
+    elif tokens & entry['tokens']:
+        score += 2.0 * len(tokens & entry['tokens']) / len(tokens)
+    if match_info['score_tokens'] & entry['scores']:
+        score += 1.5
+    if not score:
+        return None
+    return score + (0.5 if delta == 0 else 0.0)
+
+
+def link_videos(matches, videos):
+    """
+    Sets match['videos'] (best first) and match['videoId'] (the preferred one,
+    highlights before full-match uploads) on every match with a video.
+    `videos` are dicts with 'title', 'videoId' and a datetime 'publishedAt'.
+    Returns a report: {'linked', 'unmatched_matches', 'unmatched_videos', 'ambiguous'}.
+    """
+    index = VideoBuckets(videos)
+    first_video_day = min(index.by_date) if index.by_date else None
+
+    # Every (match, video) pair inside the date window, scored
+    best_for_video = {}  # videoId -> [(score, -delta), [match positions]]
+    pairs = []
+    for position, match in enumerate(matches):
+        try:
+            match_date = datetime.datetime.strptime(match['date'], '%Y-%m-%d').date()
+        except (KeyError, TypeError, ValueError):
+            continue
+        info = {
+            'opponent_tokens': opponent_tokens(match.get('opponent', '')),
+            'opponent_compact': re.sub(r'[^a-z0-9]', '', fold(match.get('opponent', ''))),
+            'score_tokens': _match_score_tokens(match.get('score', '')),
+        }
+        for delta, entry in index.candidates(match_date):
+            score = score_candidate(info, delta, entry)
+            if score is None:
+                continue
+            rank = (score, -delta)
+            video_id = entry['video']['videoId']
+            pairs.append((position, entry, rank))
+            best = best_for_video.get(video_id)
+            if best is None or rank > best[0]:
+                best_for_video[video_id] = [rank, [position]]
+            elif rank == best[0]:
+                best[1].append(position)
+
+    linked = defaultdict(list)
+    ambiguous = []
+    for position, entry, rank in pairs:
+        video_id = entry['video']['videoId']
+        best_rank, winners = best_for_video[video_id]
+        if rank != best_rank or position != winners[0]:
+            continue
+        if len(winners) > 1:
+            ambiguous.append({
+                'videoId': video_id,
+                'title': entry['video']['title'],
+                'matches': [f"{matches[p]['date']} {matches[p]['opponent']}" for p in winners]
+            })
+        linked[position].append((rank, entry))
+
+    for position, entries in linked.items():
+        # Best score first, then closest upload date, then newest upload
+        entries.sort(key=lambda item: (item[0], -item[1]['order']), reverse=True)
+        match = matches[position]
+        match['videos'] = [{
+            'videoId': entry['video']['videoId'],
+            'title': entry['video']['title'],
+            'kind': entry['kind']
+        } for _, entry in entries]
+        preferred = min(match['videos'], key=lambda v: KIND_PRIORITY[v['kind']])
+        match['videoId'] = preferred['videoId']
+
+    # Only matches played since the channel's first (team) upload can be missing a video
+    linked_ids = {v['videoId'] for m in matches for v in m.get('videos', [])}
+    since = (first_video_day - datetime.timedelta(days=WINDOW_DAYS)).isoformat() if first_video_day else None
+    unmatched_matches = [
+        f"{m['date']} {m['opponent']}" for m in matches
+        if 'videos' not in m and since and str(m.get('date', '')) >= since
+    ]
+    unmatched_videos = [
+        {'videoId': e['video']['videoId'], 'title': e['video']['title'], 'date': day.isoformat()}
+        for day, bucket in sorted(index.by_date.items()) for e in bucket
+        if e['video']['videoId'] not in linked_ids
+    ]
+
+    return {
+        'linked': len(linked),
+        'unmatched_matches': unmatched_matches,
+        'unmatched_videos': unmatched_videos,
+        'ambiguous': ambiguous,
+    }
@@ -0,0 +1,206 @@
+"""
+Incremental YouTube uploads sync with an on-disk video index.
+
+The index (.build_cache/youtube_index.json) remembers the channel's uploads
+playlist id, every video seen so far, the newest `publishedAt` and the ETag of
+the first playlist page. A build then sends one conditional request for that
+page: a 304 means nothing new was uploaded, otherwise pages are read only
+until the first already-known video.
+
+Playlist pages are chained through `nextPageToken`, so they are fetched in
+sequence over one pooled requests.Session (keep-alive, bounded retries with
+backoff, per-request timeouts).
+
+The API base URL can be pointed at a local stand-in (see
+benchmarks/fake_youtube.py) through `api_base` or YOUTUBE_API_BASE.
+"""
+import datetime
+import json
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from file_utils import write_atomic
+
+DEFAULT_API_BASE = 'https://www.googleapis.com/youtube/v3'
+# Only videos from the 23/24 season onwards are linked to matches
+VIDEO_CUTOFF = datetime.datetime(2023, 8, 1, 0, 0, 0, tzinfo=datetime.timezone.utc)
+TIMEOUT = (5, 20)  # (connect, read) seconds
+INDEX_VERSION = 1
+
+
+def make_session(retries=3):
+    """A keep-alive session that retries connection errors, 429 and 5xx responses with backoff."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET',),
+        respect_retry_after_header=True,
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=2, pool_maxsize=4)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def parse_published_at(value):
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class VideoIndex:
+    """Persistent record of the uploads already fetched for one channel."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = self._empty(None)
+
+    @staticmethod
+    def _empty(channel_id):
+        return {
+            "version": INDEX_VERSION,
+            "channel_id": channel_id,
+            "uploads_playlist_id": None,
+            "newest_published_at": None,
+            "first_page_etag": None,
+            "videos": []
+        }
+
+    def load(self, channel_id, ignore_stored=False):
+        """Loads the index for `channel_id`; a missing, unreadable or other-channel index starts empty."""
+        self.data = self._empty(channel_id)
+        if ignore_stored or not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable video index: {e}")
+            return self
+        if data.get('version') == INDEX_VERSION and data.get('channel_id') == channel_id:
+            self.data = data
+        return self
+
+    def save(self):
+        write_atomic(self.path, json.dumps(self.data).encode('utf-8'))
+
+    @property
+    def newest_published_at(self):
+        value = self.data['newest_published_at']
+        return parse_published_at(value) if value else None
+
+    def add(self, new_videos):
+        """Adds videos (newest first, as the playlist returns them) in front of the known ones."""
+        known = {v['videoId'] for v in self.data['videos']}
+        fresh = [v for v in new_videos if v['videoId'] not in known]
+        self.data['videos'] = fresh + self.data['videos']
+        if self.data['videos']:
+            self.data['newest_published_at'] = max(v['publishedAt'] for v in self.data['videos'])
+        return len(fresh)
+
+    def videos(self):
+        """Known videos with `publishedAt` as a timezone-aware datetime."""
+        return [dict(v, publishedAt=parse_published_at(v['publishedAt'])) for v in self.data['videos']]
+
+
+class YouTubeClient:
+    def __init__(self, api_key, api_base=None, session=None):
+        self.api_key = api_key
+        self.api_base = (api_base or os.environ.get('YOUTUBE_API_BASE') or DEFAULT_API_BASE).rstrip('/')
+        self.session = session or make_session()
+        self.requests_made = 0
+
+    def get(self, endpoint, params, etag=None):
+        """GETs an API endpoint. Returns (status code, json or None, etag)."""
+        headers = {'If-None-Match': etag} if etag else {}
+        self.requests_made += 1
+        response = self.session.get(f"{self.api_base}/{endpoint}", params=dict(params, key=self.api_key),
+                                    headers=headers, timeout=TIMEOUT)
+        if response.status_code == 304:
+            return 304, None, etag
+        if response.status_code != 200:
+            print(f"YouTube API error on {endpoint} ({response.status_code}): {response.text[:200]}")
+            return response.status_code, None, None
+        return 200, response.json(), response.headers.get('ETag')
+
+    def uploads_playlist_id(self, channel_id):
+        status, data, _ = self.get('channels', {'part': 'contentDetails', 'id': channel_id})
+        if status != 200 or not data.get('items'):
+            return None
+        return data['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+
+    def playlist_page(self, playlist_id, page_token=None, etag=None):
+        params = {'part': 'snippet', 'maxResults': 50, 'playlistId': playlist_id}
+        if page_token:
+            params['pageToken'] = page_token
+        return self.get('playlistItems', params, etag=etag)
+
+
+def sync_videos(api_key, channel_id, index_path, api_base=None, force=False, client=None):
+    """
+    Brings the on-disk video index up to date and returns every known video
+    since VIDEO_CUTOFF (newest first), each as {'title', 'videoId', 'publishedAt'}.
+    force=True ignores the stored index and re-reads the playlist from scratch.
+    """
+    client = client or YouTubeClient(api_key, api_base=api_base)
+    index = VideoIndex(index_path).load(channel_id, ignore_stored=force)
+
+    try:
+        playlist_id = index.data['uploads_playlist_id'] or client.uploads_playlist_id(channel_id)
+        if not playlist_id:
+            print("Error fetching channel details: no uploads playlist found.")
+            return index.videos()
+        index.data['uploads_playlist_id'] = playlist_id
+
+        known_newest = index.newest_published_at
+        new_videos = []
+        first_page_etag = index.data['first_page_etag']
+        page_token = None
+        first_page = True
+        complete = False
+
+        while True:
+            status, page, page_etag = client.playlist_page(playlist_id, page_token,
+                                                           etag=first_page_etag if first_page else None)
+            if status == 304:
+                complete = True  # First page unchanged: nothing uploaded since the last sync
+                break
+            if status != 200:
+                break
+            if first_page:
+                first_page_etag = page_etag
+
+            reached_known = False
+            for item in page.get('items', []):
+                published_at = parse_published_at(item['snippet']['publishedAt'])
+                if published_at < VIDEO_CUTOFF or (known_newest and published_at <= known_newest):
+                    reached_known = True
+                    break
+                new_videos.append({
+                    'title': item['snippet']['title'],
+                    'videoId': item['snippet']['resourceId']['videoId'],
+                    'publishedAt': item['snippet']['publishedAt']
+                })
+
+            page_token = page.get('nextPageToken')
+            first_page = False
+            if reached_known or not page_token:
+                complete = True
+                break
+    except requests.RequestException as e:
+        print(f"YouTube sync failed, using the stored video index: {str(e).replace(api_key, '***')}")
+        return index.videos()
+
+    if not complete:
+        # Don't advance the index past a gap: the next build retries from the top
+        print("YouTube sync incomplete, using the stored video index.")
+        return index.videos()
+
+    index.data['first_page_etag'] = first_page_etag
+    added = index.add(new_videos)
+    index.save()
+    print(f"YouTube sync: {added} new videos, {len(index.data['videos'])} total ({client.requests_made} requests).")
+    return index.videos()